@@ -0,0 +1 @@
+"""Benchmarks of swiss_meteo_warnings, run from the repository root."""
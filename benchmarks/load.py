@@ -0,0 +1,319 @@
+"""Load harness running many config entries on one event loop.
+
+usage: python -m benchmarks.load --entries 500 --duration 120 [options]
+
+The entries run against a local stand-in of the API with the given latency,
+error rate and payload. The event loop lag, the request rate, the memory per
+entry and the state writes per minute are written as JSON. The exit code is 1
+when some entries did not load or did not get all their sensors.
+
+With --warning-regions, the post codes are spread over that many warning
+regions and the entries fetch per region: the exit code is also 1 unless a
+single poller and a single post code per region reached the API.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from functools import partial
+
+from custom_components.swiss_meteo_warnings import (
+    coordinator as coordinator_module,
+    poller as poller_module,
+    swissmeteowarningsclient,
+)
+from custom_components.swiss_meteo_warnings.const import CONF_WARNING_REGIONS, DOMAIN
+from custom_components.swiss_meteo_warnings.regions import WARNING_REGIONS_FILE
+from custom_components.swiss_meteo_warnings.sensor import SENSOR_TYPES
+
+from .run import _async_create_hass
+from .stub import FIXTURES, StubApi, load_fixture
+
+# Period of the probe measuring the event loop lag, in seconds
+LAG_PROBE_PERIOD = 0.05
+
+
+def _rss() -> int:
+    """Get the resident memory of the process, in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Peak instead of current outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LagProbe:
+    """Measure how late the event loop runs a periodic task."""
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.samples = list[float]()
+        self.__task: asyncio.Task | None = None
+
+    async def __async_probe(self) -> None:
+        """Sleep in a loop, recording the overshoot."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_PERIOD)
+            self.samples.append(loop.time() - start - LAG_PROBE_PERIOD)
+
+    def start(self) -> None:
+        """Start probing."""
+        self.__task = asyncio.create_task(self.__async_probe())
+
+    async def async_stop(self) -> dict:
+        """Stop probing, returns the lag percentiles in milliseconds."""
+        self.__task.cancel()
+        samples = sorted(sample * 1000 for sample in self.samples) or [0.0]
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(statistics.median(samples), 3),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+            "max_ms": round(samples[-1], 3),
+        }
+
+
+def _config_entry(**kwargs):
+    """Build a config entry with the arguments the installed Home Assistant takes."""
+    from homeassistant.config_entries import ConfigEntry  # pylint: disable=import-outside-toplevel
+
+    parameters = inspect.signature(ConfigEntry).parameters
+    return ConfigEntry(**{key: value for key, value in kwargs.items() if key in parameters})
+
+
+async def _async_setup_hass(config_dir: str):
+    """Start a Home Assistant instance with its registries."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import loader
+    from homeassistant.config_entries import ConfigEntries
+    from homeassistant.helpers import (
+        area_registry,
+        device_registry,
+        entity_registry,
+        issue_registry,
+    )
+    from homeassistant.setup import async_setup_component
+
+    hass = await _async_create_hass(config_dir)
+    hass.config.skip_pip = True
+    if hasattr(loader, "async_setup"):
+        loader.async_setup(hass)
+    await area_registry.async_load(hass)
+    await device_registry.async_load(hass)
+    await entity_registry.async_load(hass)
+    await issue_registry.async_load(hass)
+    # Normally set up by the bootstrap
+    hass.data.setdefault("entity_info", {})
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await hass.async_start()
+    await async_setup_component(hass, "homeassistant", {})
+    return hass
+
+
+def _patch_intervals(interval: float) -> None:
+    """Poll every interval seconds whatever the warnings."""
+    poll = timedelta(seconds=interval)
+    for name in (
+        "UPDATE_INTERVAL_IDLE",
+        "UPDATE_INTERVAL_ACTIVE",
+        "UPDATE_INTERVAL_ESCALATING",
+        "UPDATE_INTERVAL_BACKOFF_MAX",
+    ):
+        setattr(coordinator_module, name, poll)
+
+
+def _write_warning_regions(config_dir: str, post_codes: list[str], regions: int) -> int:
+    """Spread the post codes over warning regions, returns the number of regions."""
+    mapping = dict[str, list[str]]()
+    for index, post_code in enumerate(post_codes):
+        mapping.setdefault(f"region{index % regions}", []).append(post_code)
+    with open(os.path.join(config_dir, WARNING_REGIONS_FILE), "w", encoding="utf-8") as file:
+        json.dump({"regions": mapping}, file)
+    return len(mapping)
+
+
+def _count_entities(hass) -> int:
+    """Count the warning sensors of the integration in the state machine."""
+    from homeassistant.helpers import entity_registry  # pylint: disable=import-outside-toplevel
+
+    registry = entity_registry.async_get(hass)
+    return sum(
+        (entry := registry.async_get(entity_id)) is not None and entry.platform == DOMAIN
+        for entity_id in hass.states.async_entity_ids("sensor")
+    )
+
+
+async def async_run(args: argparse.Namespace) -> dict:
+    """Set up the entries, let them run for the duration and report."""
+    if args.interval:
+        _patch_intervals(args.interval)
+    if not args.response_cache:
+        swissmeteowarningsclient._RESPONSE_CACHE_TTL = 0  # pylint: disable=protected-access
+
+    stub = StubApi(
+        [load_fixture(args.payload)],
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    url = await stub.async_start()
+    poller_module.SwissMeteoWarningsApiClient = partial(
+        swissmeteowarningsclient.SwissMeteoWarningsApiClient, base_url=url
+    )
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_setup_hass(config_dir)
+        writes = 0
+
+        def count_write(_event) -> None:
+            nonlocal writes
+            writes += 1
+
+        hass.bus.async_listen("state_changed", count_write)
+        probe = LagProbe()
+        probe.start()
+
+        post_codes = [str(1000 + index) for index in range(args.post_codes or args.entries)]
+        regions = None
+        if args.warning_regions:
+            regions = _write_warning_regions(config_dir, post_codes, args.warning_regions)
+
+        if args.tracemalloc:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if args.tracemalloc else _rss()
+        start = time.perf_counter()
+        for index in range(args.entries):
+            post_code = post_codes[index % len(post_codes)]
+            await hass.config_entries.async_add(_config_entry(
+                version=2,
+                minor_version=1,
+                domain=DOMAIN,
+                title=f"{post_code} #{index}",
+                data={"post_code": post_code, "place": post_code},
+                options={CONF_WARNING_REGIONS: regions is not None},
+                source="user",
+            ))
+        await hass.async_block_till_done()
+        setup_s = time.perf_counter() - start
+        memory_after = tracemalloc.get_traced_memory()[0] if args.tracemalloc else _rss()
+        loaded = sum(
+            entry.state.value == "loaded" for entry in hass.config_entries.async_entries(DOMAIN)
+        )
+        # Sensors rejected by Home Assistant, for instance for a duplicate unique id,
+        # would leave entries measured without their entities
+        entities = _count_entities(hass)
+        setup = {
+            "hits": stub.hits,
+            "pollers": len(poller_module._POLLERS),  # pylint: disable=protected-access
+            "post_codes_fetched": len(stub.post_codes),
+            "writes": writes,
+            "lag": await probe.async_stop(),
+        }
+
+        # Steady state
+        hits, writes, errors = stub.hits, 0, stub.errors
+        probe = LagProbe()
+        probe.start()
+        await asyncio.sleep(args.duration)
+        lag = await probe.async_stop()
+        steady_hits = stub.hits - hits
+        steady_errors = stub.errors - errors
+
+        await hass.async_stop(force=True)
+    await stub.async_stop()
+
+    return {
+        "parameters": vars(args),
+        "setup": {
+            "seconds": round(setup_s, 3),
+            "entries_loaded": loaded,
+            "entities": entities,
+            "entities_expected": args.entries * len(SENSOR_TYPES),
+            "warning_regions": regions,
+            "pollers": setup["pollers"],
+            "post_codes_fetched": setup["post_codes_fetched"],
+            "requests": setup["hits"],
+            "state_writes": setup["writes"],
+            "loop_lag": setup["lag"],
+        },
+        "memory": {
+            "source": "tracemalloc" if args.tracemalloc else "rss",
+            "total_bytes": memory_after - memory_before,
+            "per_entry_bytes": round((memory_after - memory_before) / max(1, args.entries)),
+        },
+        "steady": {
+            "seconds": args.duration,
+            "requests": steady_hits,
+            "requests_per_minute": round(steady_hits * 60 / args.duration, 2),
+            "errors": steady_errors,
+            "state_writes": writes,
+            "state_writes_per_minute": round(writes * 60 / args.duration, 2),
+            "loop_lag": lag,
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the load harness from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--post-codes", type=int, default=0,
+        help="distinct post codes, one per entry by default")
+    parser.add_argument("--warning-regions", type=int, default=0,
+        help="spread the post codes over that many warning regions, fetched once each")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of steady state")
+    parser.add_argument("--interval", type=float, default=0,
+        help="poll every interval seconds instead of the adaptive intervals")
+    parser.add_argument("--payload", choices=FIXTURES, default="typical")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="ratio of 503 answers")
+    parser.add_argument("--response-cache", action="store_true",
+        help="keep the shared response cache of the client")
+    parser.add_argument("--tracemalloc", action="store_true",
+        help="measure memory with tracemalloc instead of the RSS, slower")
+    parser.add_argument("--output", help="write the report to this file, stdout by default")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(async_run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+    setup = report["setup"]
+    if setup["entries_loaded"] < args.entries or setup["entities"] < setup["entities_expected"]:
+        sys.stderr.write(
+            f"{setup['entries_loaded']} of {args.entries} entries loaded with "
+            f"{setup['entities']} of {setup['entities_expected']} sensors, "
+            "the measures do not cover every entry\n"
+        )
+        return 1
+    if setup["warning_regions"] is not None and not (
+        setup["pollers"] == setup["post_codes_fetched"] == setup["warning_regions"]
+    ):
+        sys.stderr.write(
+            f"{setup['pollers']} pollers fetched {setup['post_codes_fetched']} post codes "
+            f"for {setup['warning_regions']} warning regions\n"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Benchmarks of the decoding, the refresh cycle and the import of the integration.
+
+usage: python -m benchmarks.run [--output results.json] [--compare baseline.json]
+
+Results are written as JSON, with the median, p95, min and mean of each benchmark
+in milliseconds. With --compare, the exit code is 1 when a median regressed by
+more than --max-regression compared to a previous run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+
+import aiohttp
+
+from custom_components.swiss_meteo_warnings import swissmeteowarningsclient
+from custom_components.swiss_meteo_warnings.swissmeteowarningsclient import (
+    SwissMeteoWarningsApiClient,
+    decode_warning,
+)
+
+from .stub import FIXTURES, StubApi, changed_fixture, load_fixture
+
+# Modules of Home Assistant imported before timing the import of the integration
+_HA_MODULES = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.components.sensor",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+_INTEGRATION_MODULES = (
+    "custom_components.swiss_meteo_warnings",
+    "custom_components.swiss_meteo_warnings.config_flow",
+    "custom_components.swiss_meteo_warnings.sensor",
+)
+
+
+def _summary(samples: list[float], **extra: float) -> dict:
+    """Summarize samples in seconds as milliseconds."""
+    samples = sorted(sample * 1000 for sample in samples)
+    return {
+        "unit": "ms",
+        "iterations": len(samples),
+        "median": round(statistics.median(samples), 4),
+        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "min": round(samples[0], 4),
+        "mean": round(statistics.fmean(samples), 4),
+        **extra,
+    }
+
+
+async def _async_time(
+    function: Callable[[int], Awaitable[object]],
+    iterations: int,
+    warmup: int = 3,
+) -> list[float]:
+    """Time the iterations of a coroutine function."""
+    for iteration in range(warmup):
+        await function(iteration)
+    samples = []
+    for iteration in range(warmup, warmup + iterations):
+        start = time.perf_counter()
+        await function(iteration)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_decode(body: bytes, iterations: int) -> dict:
+    """Decode the warnings array of a response, as async_get_data does."""
+    raw_warnings = json.dumps(json.loads(body)["warnings"]).encode()
+    count = 0
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        warnings = [
+            warning for json_warning in json.loads(raw_warnings)
+            if (warning := decode_warning(json_warning)) is not None
+        ]
+        samples.append(time.perf_counter() - start)
+        count = len(warnings)
+    total = sum(samples)
+    return _summary(
+        samples,
+        warnings=count,
+        warnings_per_s=round(count * iterations / total) if total else None,
+    )
+
+
+async def bench_client(body: bytes, iterations: int) -> dict:
+    """Fetch and decode a response from the stub with a new client each time."""
+    stub = StubApi([body])
+    url = await stub.async_start()
+    try:
+        async with aiohttp.ClientSession() as session:
+
+            async def fetch(iteration: int) -> None:
+                # A post code per iteration, so the shared response cache is not used
+                await SwissMeteoWarningsApiClient(
+                    10000 + iteration, "en", "CH", session=session, base_url=url
+                ).async_get_data()
+
+            samples = await _async_time(fetch, iterations)
+    finally:
+        await stub.async_stop()
+    return _summary(samples, bytes=len(body))
+
+
+async def _async_create_hass(config_dir: str):
+    """Create a bare Home Assistant instance."""
+    from homeassistant.core import HomeAssistant  # pylint: disable=import-outside-toplevel
+
+    if "config_dir" in inspect.signature(HomeAssistant).parameters:
+        hass = HomeAssistant(config_dir)
+    else:
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    hass.config.language = "en"
+    hass.config.country = "CH"
+    return hass
+
+
+async def bench_refresh(bodies: list[bytes], iterations: int) -> dict:
+    """Refresh a coordinator against the stub, publishing to its listeners."""
+    # pylint: disable-next=import-outside-toplevel
+    from custom_components.swiss_meteo_warnings.coordinator import (
+        SwissMeteoWarningsCoordinator,
+    )
+
+    stub = StubApi(bodies)
+    url = await stub.async_start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_create_hass(config_dir)
+        try:
+            async with aiohttp.ClientSession() as session:
+                coordinator = SwissMeteoWarningsCoordinator(hass, "1000")
+                coordinator.poller.client = coordinator.client = SwissMeteoWarningsApiClient(
+                    "1000", "en", "CH", session=session, base_url=url
+                )
+                coordinator.async_add_listener(lambda: None)
+
+                async def refresh(_iteration: int) -> None:
+                    await coordinator.async_refresh()
+
+                samples = await _async_time(refresh, iterations)
+                coordinator.async_release()
+        finally:
+            await hass.async_stop(force=True)
+            await stub.async_stop()
+    return _summary(samples)
+
+
+def bench_import(iterations: int) -> dict:
+    """Import the integration in new interpreters, Home Assistant being already imported."""
+    code = (
+        "import time\n"
+        + "".join(f"import {module}\n" for module in _HA_MODULES)
+        + "start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in _INTEGRATION_MODULES)
+        + "print(time.perf_counter() - start)\n"
+    )
+    samples = [
+        float(subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout)
+        for _ in range(iterations)
+    ]
+    return _summary(samples)
+
+
+async def _async_run(args: argparse.Namespace) -> dict:
+    """Run the selected benchmarks."""
+    # Every refresh must reach the stub
+    swissmeteowarningsclient._RESPONSE_CACHE_TTL = 0  # pylint: disable=protected-access
+
+    benchmarks = {}
+    for fixture in FIXTURES:
+        body = load_fixture(fixture)
+        benchmarks[f"decode/{fixture}"] = lambda body=body: bench_decode(
+            body, args.iterations * 10
+        )
+        benchmarks[f"client/{fixture}"] = lambda body=body: bench_client(body, args.iterations)
+        benchmarks[f"refresh_unchanged/{fixture}"] = lambda body=body: bench_refresh(
+            [body], args.iterations
+        )
+        benchmarks[f"refresh_changed/{fixture}"] = lambda body=body: bench_refresh(
+            [body, changed_fixture(body)], args.iterations
+        )
+    benchmarks["import/integration"] = lambda: bench_import(max(5, args.iterations // 10))
+
+    results = {}
+    for name, benchmark in benchmarks.items():
+        if args.only and not any(only in name for only in args.only):
+            continue
+        result = benchmark()
+        if inspect.isawaitable(result):
+            result = await result
+        results[name] = result
+        sys.stderr.write(f"{name}: median {result['median']} ms, p95 {result['p95']} ms\n")
+    return results
+
+
+def _environment() -> dict:
+    """Describe what the results were measured with."""
+    environment = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "aiohttp": aiohttp.__version__,
+    }
+    try:
+        from homeassistant.const import __version__  # pylint: disable=import-outside-toplevel
+
+        environment["homeassistant"] = __version__
+    except ImportError:
+        pass
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        environment["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    return environment
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """List the benchmarks whose median regressed compared to a baseline."""
+    regressions = []
+    for name, result in results.items():
+        if (previous := baseline.get(name)) is None or not previous["median"]:
+            continue
+        ratio = result["median"] / previous["median"] - 1
+        if ratio > max_regression:
+            regressions.append(
+                f"{name}: median {previous['median']} -> {result['median']} ms (+{ratio:.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", action="append", help="run benchmarks containing this")
+    parser.add_argument("--output", help="write the results to this file, stdout by default")
+    parser.add_argument("--compare", help="results of a previous run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="0.2 for 20%%")
+    args = parser.parse_args(argv)
+
+    report = {
+        "environment": _environment(),
+        "results": asyncio.run(_async_run(args)),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        if regressions := compare(report["results"], baseline, args.max_regression):
+            sys.stderr.write("Regressions:\n" + "\n".join(regressions) + "\n")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Local stand-in of the MeteoSwiss API serving recorded plzDetail payloads."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+from collections.abc import Sequence
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURES = ("none", "typical", "storm")
+
+
+def load_fixture(name: str) -> bytes:
+    """Get the body of a recorded plzDetail response."""
+    with open(os.path.join(FIXTURES_DIR, f"plzdetail_{name}.json"), "rb") as file:
+        return file.read()
+
+
+def changed_fixture(body: bytes) -> bytes:
+    """Get a copy of a response whose warnings differ, to defeat the no change paths."""
+    payload = json.loads(body)
+    for warning in payload["warnings"]:
+        warning["validTo"] += 1
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class StubApi:
+    """Serve /v2/plzDetail with configurable latency and error rate.
+
+    The payloads are served in turn, one per request.
+    """
+
+    def __init__(
+        self,
+        payloads: Sequence[bytes],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+    ) -> None:
+        """Init class, latency and jitter are in seconds."""
+        self.payloads = payloads
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hits = 0
+        self.errors = 0
+        # plz parameters of the requests, the post code followed by 00
+        self.post_codes = set[str]()
+        self.bytes_sent = 0
+        self.__runner: web.AppRunner | None = None
+
+    async def __handle(self, request: web.Request) -> web.Response:
+        """Answer a plzDetail request."""
+        self.hits += 1
+        self.post_codes.add(request.query.get("plz", "")[:-2])
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503)
+        body = self.payloads[self.hits % len(self.payloads)]
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json")
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving, returns the base url."""
+        app = web.Application()
+        app.router.add_get("/v2/plzDetail", self.__handle)
+        self.__runner = web.AppRunner(app, access_log=None)
+        await self.__runner.setup()
+        await web.TCPSite(self.__runner, host, port).start()
+        host, port = self.__runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
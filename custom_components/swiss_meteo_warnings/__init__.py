@@ -5,57 +5,18 @@ https://github.com/marquisolivier/swiss_meteo_warnings
 """
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .swissmeteowarningsclient import SwissMeteoWarningsApiClient
-from .const import DOMAIN, LOGGER, CONF_POST_CODE
-from .coordinator import SwissMeteoWarningsCoordinator
-
-PLATFORMS: list[Platform] = [
-    Platform.SENSOR,
-]
-
-# https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up this integration using UI."""
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - async_setup_entry start")
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][
-        entry.entry_id
-    ] = coordinator = SwissMeteoWarningsCoordinator(
-        hass=hass,
-        client=SwissMeteoWarningsApiClient(
-            entry.data[CONF_POST_CODE],
-            hass.config.language,
-            hass.config.country,
-            session=async_get_clientsession(hass),
-        )
+try:
+    from .integration import (  # noqa: F401
+        CONFIG_SCHEMA,
+        PLATFORMS,
+        async_migrate_entry,
+        async_remove_entry,
+        async_setup,
+        async_setup_entry,
+        async_unload_entry,
+        async_update_options,
     )
-
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - refresh")
-    await coordinator.async_config_entry_first_refresh()
-
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - setup")
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
-
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - return")
-    return True
-
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Handle removal of an entry."""
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - async_unload_entry")
-    if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
-    return unloaded
-
-
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    LOGGER.debug("Swiss Meteo Warnings - __init__ - async_reload_entry")
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+except ModuleNotFoundError as exception:
+    # Imported outside Home Assistant, for the API client or the batch client
+    if exception.name != "homeassistant":
+        raise
@@ -0,0 +1,245 @@
+"""Columnar snapshot of the warnings of every monitored post code, with roll-ups."""
+from __future__ import annotations
+
+import csv
+from array import array
+from collections.abc import Callable, Mapping
+from datetime import datetime, timezone
+
+from .history import TIMESTAMP_UNBOUNDED, window_timestamp
+from .snapshot import SwissMeteoWarningsSnapshot
+from .swissmeteowarningsclient import (
+    VALID_FROM_UNBOUNDED,
+    VALID_TO_UNBOUNDED,
+    WarningType,
+)
+
+EXPORT_FORMATS = ("parquet", "arrow", "csv")
+
+# Index of each type in the dictionary of the Arrow type column
+_TYPE_CODES = {warning_type.value: code for code, warning_type in enumerate(WarningType)}
+
+# (group, type) or group -> (max level, number of post codes)
+_Cells = dict[tuple[str, int], tuple[int, int]]
+_Totals = dict[str, tuple[int, int]]
+
+
+def _arrow_column(values: array):
+    """Wrap a column in a pyarrow Array, sharing its buffer."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+    arrow_type = {"B": pa.uint8(), "H": pa.uint16(), "I": pa.uint32()}[values.typecode]
+    return pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])
+
+
+class WarningColumns:
+    """Warnings of many post codes as one array per field, a row per warning."""
+
+    def __init__(self, snapshots: Mapping[int | str, SwissMeteoWarningsSnapshot]) -> None:
+        """Init class from the snapshot of each post code."""
+        self.post_codes = array("H")
+        self.types = array("H")
+        self.levels = array("B")
+        self.outlooks = array("B")
+        self.valid_from = array("I")
+        self.valid_to = array("I")
+        self.sites = len(snapshots)
+        # Neighbouring post codes share the same warning instances, encode each
+        # one once, by identity as hashing the whole warning costs more
+        rows = dict[int, tuple[int, int, int, int, int]]()
+        for post_code, snapshot in snapshots.items():
+            for warning in snapshot.warnings:
+                if (row := rows.get(id(warning))) is None:
+                    row = rows[id(warning)] = (
+                        warning.type,
+                        warning.level,
+                        warning.outlook,
+                        window_timestamp(warning.valid_from, VALID_FROM_UNBOUNDED, 0),
+                        window_timestamp(warning.valid_to, VALID_TO_UNBOUNDED, TIMESTAMP_UNBOUNDED),
+                    )
+                self.post_codes.append(int(post_code))
+                self.types.append(row[0])
+                self.levels.append(row[1])
+                self.outlooks.append(row[2])
+                self.valid_from.append(row[3])
+                self.valid_to.append(row[4])
+
+    def __len__(self) -> int:
+        """Get the number of warnings."""
+        return len(self.post_codes)
+
+    def rollup(
+        self,
+        group: Callable[[int], str | None],
+        when: datetime | None = None,
+        include_outlook: bool = False,
+    ) -> dict[str, dict]:
+        """Get the max level and the number of affected post codes per group and type.
+
+        group maps a post code to its group, post codes without one are skipped.
+        Only the warnings valid at when are counted, all of them when it is None.
+        The columns are filtered and grouped by pyarrow compute kernels when
+        pyarrow is installed, else by a loop over the rows. Either way, run it in
+        the executor.
+        """
+        groups = {post_code: group(post_code) for post_code in set(self.post_codes)}
+        moment = None if when is None else int(when.timestamp())
+        try:
+            cells, totals = self.__arrow_cells(groups, moment, include_outlook)
+        except ImportError:
+            cells, totals = self.__cells(groups, moment, include_outlook)
+
+        rollups = {
+            key: {"max_level": level, "sites": sites, "types": {}}
+            for key, (level, sites) in sorted(totals.items())
+        }
+        for (key, warning_type), (level, sites) in sorted(cells.items()):
+            rollups[key]["types"][WarningType(warning_type).name.lower()] = {
+                "max_level": level,
+                "sites": sites,
+            }
+        return rollups
+
+    def __cells(
+        self,
+        groups: dict[int, str | None],
+        moment: int | None,
+        include_outlook: bool,
+    ) -> tuple[_Cells, _Totals]:
+        """Roll the rows up per group and type, and per group, in a loop."""
+        # (group, type) -> [max level, post codes]
+        cells = dict[tuple[str, int], list]()
+        for post_code, warning_type, level, outlook, valid_from, valid_to in zip(
+            self.post_codes, self.types, self.levels, self.outlooks,
+            self.valid_from, self.valid_to,
+        ):
+            if (key := groups[post_code]) is None or (outlook and not include_outlook):
+                continue
+            if moment is not None and not valid_from <= moment < valid_to:
+                continue
+            if (cell := cells.get((key, warning_type))) is None:
+                cell = cells[key, warning_type] = [level, set()]
+            elif level > cell[0]:
+                cell[0] = level
+            cell[1].add(post_code)
+
+        totals = dict[str, list]()
+        for (key, _), (level, post_codes) in cells.items():
+            if (total := totals.get(key)) is None:
+                totals[key] = [level, set(post_codes)]
+            else:
+                total[0] = max(total[0], level)
+                total[1] |= post_codes
+        return (
+            {cell: (level, len(sites)) for cell, (level, sites) in cells.items()},
+            {key: (level, len(sites)) for key, (level, sites) in totals.items()},
+        )
+
+    def __arrow_cells(
+        self,
+        groups: dict[int, str | None],
+        moment: int | None,
+        include_outlook: bool,
+    ) -> tuple[_Cells, _Totals]:
+        """Roll the rows up per group and type, and per group, with pyarrow compute."""
+        # pylint: disable=import-outside-toplevel
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        post_codes = _arrow_column(self.post_codes)
+        # Group of each row, looked up once per distinct post code
+        distinct = pa.array(list(groups), pa.uint16())
+        group_column = pc.take(
+            pa.array(list(groups.values()), pa.string()),
+            pc.index_in(post_codes, value_set=distinct),
+        )
+        mask = pc.is_valid(group_column)
+        if not include_outlook:
+            mask = pc.and_(mask, pc.equal(_arrow_column(self.outlooks), 0))
+        if moment is not None:
+            mask = pc.and_(mask, pc.and_(
+                pc.less_equal(_arrow_column(self.valid_from), moment),
+                pc.greater(_arrow_column(self.valid_to), moment),
+            ))
+        table = pa.table({
+            "group": group_column,
+            "type": _arrow_column(self.types),
+            "level": _arrow_column(self.levels),
+            "post_code": post_codes,
+        }).filter(mask)
+
+        aggregations = [("level", "max"), ("post_code", "count_distinct")]
+        cells = table.group_by(["group", "type"]).aggregate(aggregations).to_pydict()
+        totals = table.group_by("group").aggregate(aggregations).to_pydict()
+        return (
+            {
+                (key, warning_type): (level, sites)
+                for key, warning_type, level, sites in zip(
+                    cells["group"], cells["type"],
+                    cells["level_max"], cells["post_code_count_distinct"],
+                )
+            },
+            {
+                key: (level, sites)
+                for key, level, sites in zip(
+                    totals["group"], totals["level_max"], totals["post_code_count_distinct"]
+                )
+            },
+        )
+
+    def to_arrow(self):
+        """Build a pyarrow Table, unbounded validity windows being null."""
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+        def timestamps(values: array, unbounded: int) -> pa.Array:
+            return pa.array(
+                [None if value == unbounded else value for value in values],
+                pa.timestamp("s", tz="UTC"),
+            )
+
+        return pa.table({
+            "post_code": _arrow_column(self.post_codes),
+            "type": pa.DictionaryArray.from_arrays(
+                pa.array([_TYPE_CODES[value] for value in self.types], pa.int8()),
+                [warning_type.name.lower() for warning_type in WarningType],
+            ),
+            "level": _arrow_column(self.levels),
+            "valid_from": timestamps(self.valid_from, 0),
+            "valid_to": timestamps(self.valid_to, TIMESTAMP_UNBOUNDED),
+            "outlook": _arrow_column(self.outlooks).cast(pa.bool_()),
+        })
+
+    def write(self, path: str, export_format: str) -> None:
+        """Write the warnings as Parquet, Arrow IPC or CSV.
+
+        Parquet and Arrow need pyarrow. This does blocking I/O, run it in the executor.
+        """
+        if export_format == "parquet":
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+            pq.write_table(self.to_arrow(), path)
+        elif export_format == "arrow":
+            from pyarrow import feather  # pylint: disable=import-outside-toplevel
+
+            feather.write_feather(self.to_arrow(), path)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(
+                    ("post_code", "type", "level", "valid_from", "valid_to", "outlook")
+                )
+                writer.writerows(zip(
+                    self.post_codes,
+                    (WarningType(value).name.lower() for value in self.types),
+                    self.levels,
+                    (_isoformat(value, 0) for value in self.valid_from),
+                    (_isoformat(value, TIMESTAMP_UNBOUNDED) for value in self.valid_to),
+                    map(bool, self.outlooks),
+                ))
+
+
+def _isoformat(timestamp: int, unbounded: int) -> str:
+    """Format a validity window boundary, empty when unbounded."""
+    if timestamp == unbounded:
+        return ""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
@@ -0,0 +1,173 @@
+"""Batch client fetching the warnings of many post codes, usable outside Home Assistant.
+
+usage: python -m custom_components.swiss_meteo_warnings.batch [options] [post codes | -]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import TextIO
+
+import aiohttp
+
+from .swissmeteowarningsclient import (
+    API_BASE_URL,
+    DEFAULT_RETRIES,
+    SwissMeteoWarning,
+    SwissMeteoWarningsApiClient,
+    SwissMeteoWarningsApiClientError,
+)
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_KEEPALIVE = 30
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult:
+    """Warnings of a post code, or the error that prevented fetching them."""
+
+    post_code: str
+    warnings: list[SwissMeteoWarning] | None = None
+    error: SwissMeteoWarningsApiClientError | None = None
+
+    def as_dict(self) -> dict:
+        """Serialize the result."""
+        if self.error is not None:
+            return {"post_code": self.post_code, "error": str(self.error)}
+        return {
+            "post_code": self.post_code,
+            "warnings": [warning.as_dict() for warning in self.warnings],
+        }
+
+
+def create_session(
+    concurrency: int = DEFAULT_CONCURRENCY,
+    limit_per_host: int = 0,
+    keepalive: float = DEFAULT_KEEPALIVE,
+) -> aiohttp.ClientSession:
+    """Create a session whose connection pool matches the concurrency."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=concurrency,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive,
+            ttl_dns_cache=300,
+        ),
+    )
+
+
+async def read_lines(stream: TextIO) -> AsyncIterator[str]:
+    """Read the non-empty lines of a stream in the executor, off the event loop."""
+    loop = asyncio.get_running_loop()
+    while line := await loop.run_in_executor(None, stream.readline):
+        if line := line.strip():
+            yield line
+
+
+async def fetch_many(
+    post_codes: Iterable[int | str] | AsyncIterable[int | str],
+    session: aiohttp.ClientSession,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    language: str | None = "en",
+    country: str | None = "CH",
+    base_url: str = API_BASE_URL,
+    retries: int = DEFAULT_RETRIES,
+) -> AsyncIterator[BatchResult]:
+    """Fetch the warnings of post codes, yielding the results as they complete.
+
+    At most concurrency requests are in flight at the same time. The post codes
+    are taken as the workers get free, an async iterable of post codes lets a
+    slow producer feed them without blocking the requests in flight.
+    """
+    results = asyncio.Queue[BatchResult | None]()
+    if isinstance(post_codes, AsyncIterable):
+        pending_async = aiter(post_codes)
+        lock = asyncio.Lock()
+
+        async def next_post_code() -> int | str | None:
+            """Get the next post code, one worker at a time."""
+            async with lock:
+                return await anext(pending_async, None)
+    else:
+        pending = iter(post_codes)
+
+        async def next_post_code() -> int | str | None:
+            """Get the next post code."""
+            return next(pending, None)
+
+    async def worker() -> None:
+        """Fetch post codes until there are none left."""
+        try:
+            while (post_code := await next_post_code()) is not None:
+                client = SwissMeteoWarningsApiClient(
+                    str(post_code), language, country,
+                    session=session, base_url=base_url, retries=retries,
+                )
+                try:
+                    result = BatchResult(str(post_code), warnings=await client.async_get_data())
+                except SwissMeteoWarningsApiClientError as exception:
+                    result = BatchResult(str(post_code), error=exception)
+                await results.put(result)
+        finally:
+            await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            if (result := await results.get()) is None:
+                running -= 1
+            else:
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def _async_main(args: argparse.Namespace) -> int:
+    """Stream the results as NDJSON, returns the number of failed post codes."""
+    if args.post_codes == ["-"]:
+        post_codes = read_lines(sys.stdin)
+    else:
+        post_codes = args.post_codes
+
+    failures = 0
+    async with create_session(args.concurrency, args.limit_per_host, args.keepalive) as session:
+        async for result in fetch_many(
+            post_codes,
+            session,
+            concurrency=args.concurrency,
+            language=args.language,
+            country=args.country,
+            base_url=args.base_url,
+            retries=args.retries,
+        ):
+            failures += result.error is not None
+            sys.stdout.write(json.dumps(result.as_dict(), ensure_ascii=False) + "\n")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the batch client from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Fetch MeteoSwiss warnings of many post codes as NDJSON."
+    )
+    parser.add_argument("post_codes", nargs="+", help="post codes, or - to read them from stdin")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--limit-per-host", type=int, default=0, help="0 for no limit")
+    parser.add_argument("--keepalive", type=float, default=DEFAULT_KEEPALIVE, help="seconds")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--country", default="CH")
+    parser.add_argument("--base-url", default=API_BASE_URL)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="per post code")
+    args = parser.parse_args(argv)
+    return 1 if asyncio.run(_async_main(args)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
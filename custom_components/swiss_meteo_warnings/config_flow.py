@@ -1,21 +1,53 @@
 """Adds config flow for Blueprint."""
 from __future__ import annotations
 
+import re
+
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .geodata import GeoData
+from .geodata import GeoData, async_get_geo_data_cache
+from .postcodes import async_get_post_code_index
+from .regions import async_get_warning_region_index
+from .swissmeteowarningsclient import WarningType
+
+from .const import (
+    DOMAIN,
+    LOGGER,
+    CONF_DYNAMIC_SENSORS,
+    CONF_LANGUAGE,
+    CONF_MAX_STALENESS,
+    CONF_POLL_INTERVAL,
+    CONF_POST_CODE,
+    CONF_PLACE,
+    CONF_RETIRE_AFTER,
+    CONF_WARNING_REGIONS,
+    CONF_WARNING_TYPES,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_RETIRE_AFTER,
+    LANGUAGES,
+)
 
-from .const import DOMAIN, LOGGER, CONF_POST_CODE, CONF_PLACE
+_POST_CODE = re.compile(r"[1-9]\d{3}")
 
 class SwissMeteoWarningsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Swiss Meteo Warnings."""
 
     LOGGER.debug("Swiss Meteo Warnings - config flow - SwissMeteoWarningsFlowHandler")
 
-    VERSION = 1
+    VERSION = 2
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> SwissMeteoWarningsOptionsFlowHandler:
+        """Get the options flow of an entry."""
+        return SwissMeteoWarningsOptionsFlowHandler(config_entry)
 
     async def async_step_user(
         self,
@@ -24,22 +56,28 @@ class SwissMeteoWarningsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle a flow initialized by the user."""
         _errors = {}
         if user_input is not None:
-            return self.async_create_entry(
-                title=user_input[CONF_PLACE],
-                data=user_input,
+            if _POST_CODE.fullmatch(user_input[CONF_POST_CODE]):
+                return self.async_create_entry(
+                    title=user_input[CONF_PLACE],
+                    data=user_input,
+                )
+            _errors[CONF_POST_CODE] = "invalid_post_code"
+            post_code = user_input[CONF_POST_CODE]
+            place = user_input[CONF_PLACE]
+        else:
+            LOGGER.debug("Swiss Meteo Warnings - config flow - get geo data")
+            geo_data = GeoData(
+                self.hass.config.latitude,
+                self.hass.config.longitude,
+                session=async_get_clientsession(self.hass),
+                post_codes=await async_get_post_code_index(self.hass),
+                cache=await async_get_geo_data_cache(self.hass),
             )
+            await geo_data.init_geo_data()
+            place = geo_data.get_place()
+            post_code = geo_data.get_post_code()
 
-        LOGGER.debug("Swiss Meteo Warnings - config flow - get geo data")
-        geo_data = GeoData(
-            self.hass.config.latitude,
-            self.hass.config.longitude,
-            session=async_get_clientsession(self.hass)
-        )
-        await geo_data.init_geo_data()
-        place = geo_data.get_place()
-        post_code = geo_data.get_post_code()
-
-        LOGGER.debug("Swiss Meteo Warnings - config flow - got geo data")
+            LOGGER.debug("Swiss Meteo Warnings - config flow - got geo data")
 
         return self.async_show_form(
             step_id="user",
@@ -65,3 +103,96 @@ class SwissMeteoWarningsFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=_errors,
         )
+
+
+class SwissMeteoWarningsOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Swiss Meteo Warnings, applied without reloading the entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize."""
+        self.__entry = config_entry
+
+    async def async_step_init(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.FlowResult:
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            if not _POST_CODE.fullmatch(user_input[CONF_POST_CODE]):
+                errors[CONF_POST_CODE] = "invalid_post_code"
+            elif user_input[CONF_WARNING_REGIONS] \
+                    and await async_get_warning_region_index(self.hass) is None:
+                errors[CONF_WARNING_REGIONS] = "no_warning_regions"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.__entry.options, **(user_input or {})}
+        language = self.hass.config.language
+        warning_types = [warning_type.name.lower() for warning_type in WarningType]
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_POST_CODE,
+                        default=options.get(CONF_POST_CODE)
+                            or self.__entry.data[CONF_POST_CODE],
+                    ): selector.TextSelector(),
+                    vol.Required(
+                        CONF_LANGUAGE,
+                        default=options.get(
+                            CONF_LANGUAGE, language if language in LANGUAGES else "en"
+                        ),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(options=list(LANGUAGES)),
+                    ),
+                    vol.Required(
+                        CONF_POLL_INTERVAL,
+                        default=options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0, max=60, mode=selector.NumberSelectorMode.BOX,
+                            unit_of_measurement="min",
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_WARNING_TYPES,
+                        default=options.get(CONF_WARNING_TYPES, warning_types),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=warning_types,
+                            multiple=True,
+                            translation_key=CONF_WARNING_TYPES,
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_DYNAMIC_SENSORS,
+                        default=options.get(CONF_DYNAMIC_SENSORS, False),
+                    ): selector.BooleanSelector(),
+                    vol.Required(
+                        CONF_RETIRE_AFTER,
+                        default=options.get(CONF_RETIRE_AFTER, DEFAULT_RETIRE_AFTER),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0, max=365, mode=selector.NumberSelectorMode.BOX,
+                            unit_of_measurement="d",
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_WARNING_REGIONS,
+                        default=options.get(CONF_WARNING_REGIONS, False),
+                    ): selector.BooleanSelector(),
+                    vol.Required(
+                        CONF_MAX_STALENESS,
+                        default=options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0, max=1440, mode=selector.NumberSelectorMode.BOX,
+                            unit_of_measurement="min",
+                        ),
+                    ),
+                }
+            ),
+            errors=errors,
+        )
@@ -1,4 +1,5 @@
 """Constants for swiss_meteo_warnings."""
+from datetime import timedelta
 from logging import Logger, getLogger
 
 LOGGER: Logger = getLogger(__package__)
@@ -10,3 +11,39 @@ ATTRIBUTION = "Data provided by Meteo Swiss"
 
 CONF_PLACE = "place"
 CONF_POST_CODE = "post_code"
+CONF_MAX_STALENESS = "max_staleness"
+CONF_WARNING_REGIONS = "warning_regions"
+CONF_DYNAMIC_SENSORS = "dynamic_sensors"
+CONF_RETIRE_AFTER = "retire_after"
+CONF_LANGUAGE = "language"
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_WARNING_TYPES = "warning_types"
+
+# Languages of the API, Home Assistant's one by default
+LANGUAGES = ("de", "fr", "it", "en")
+
+# Fired once per added, removed, escalated or de-escalated warning
+EVENT_WARNING_CHANGED = "swiss_meteo_warnings_warning_changed"
+
+# Restored warnings older than this, in minutes, are not used at startup
+DEFAULT_MAX_STALENESS = 180
+
+# Fixed interval between polls, in minutes, 0 for the adaptive intervals
+DEFAULT_POLL_INTERVAL = 0
+
+# Dynamic sensors idle for this long, in days, are removed, 0 to keep them
+DEFAULT_RETIRE_AFTER = 0
+# Period of the check for idle dynamic sensors
+RETIRE_CHECK_INTERVAL = timedelta(hours=1)
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60
+
+# Adaptive polling
+UPDATE_INTERVAL_IDLE = timedelta(minutes=15)
+UPDATE_INTERVAL_ACTIVE = timedelta(minutes=5)
+UPDATE_INTERVAL_ESCALATING = timedelta(minutes=1)
+UPDATE_INTERVAL_BACKOFF_MAX = timedelta(minutes=30)
+UPDATE_INTERVAL_JITTER = 0.2
+# Delay after a validity window boundary before polling again
+BOUNDARY_POLL_DELAY = timedelta(seconds=30)
@@ -1,21 +1,43 @@
 """DataUpdateCoordinator for swiss_meteo_warnings."""
 from __future__ import annotations
 
-from datetime import timedelta
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
+from .metrics import STAGE_PUBLISH
+from .poller import async_acquire_poller, async_release_poller
+from .regions import WarningRegionIndex
+from .snapshot import SwissMeteoWarningsSnapshot
 from .swissmeteowarningsclient import (
-    SwissMeteoWarningsApiClient,
+    SwissMeteoWarningsApiClientCommunicationError,
     SwissMeteoWarningsApiClientError,
 )
 
-from .const import DOMAIN, LOGGER
+from .const import (
+    BOUNDARY_POLL_DELAY,
+    DOMAIN,
+    LOGGER,
+    UPDATE_INTERVAL_ACTIVE,
+    UPDATE_INTERVAL_BACKOFF_MAX,
+    UPDATE_INTERVAL_ESCALATING,
+    UPDATE_INTERVAL_IDLE,
+    UPDATE_INTERVAL_JITTER,
+)
+
+if TYPE_CHECKING:
+    from .profiler import RefreshProfiler
 
 class SwissMeteoWarningsCoordinator(DataUpdateCoordinator):
     """Class to manage fetching data from the API."""
@@ -27,22 +49,203 @@ class SwissMeteoWarningsCoordinator(DataUpdateCoordinator):
     def __init__(
         self,
         hass: HomeAssistant,
-        client: SwissMeteoWarningsApiClient,
+        post_code: str,
+        regions: WarningRegionIndex | None = None,
+        language: str | None = None,
+        poll_interval: timedelta | None = None,
     ) -> None:
         """Initialize."""
         LOGGER.debug("Swiss Meteo Warnings - coordinator - __init__")
-        self.client = client
+        self.post_code = post_code
+        self.language = language
+        self.regions = regions
+        # Fixed interval between polls instead of the adaptive ones
+        self.poll_interval = poll_interval
+        self.poller = async_acquire_poller(hass, post_code, self, regions, language)
+        self.client = self.poller.client
+        self.__published = None
+        self.__failures = 0
+        self.__unsub_level_change: CALLBACK_TYPE | None = None
+        self.__refresh_listeners: list[Callable[[], None]] = []
+        self.profiler: RefreshProfiler | None = None
         super().__init__(
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=1),
+            update_interval=UPDATE_INTERVAL_ESCALATING,
         )
 
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        """Refresh data, profiling the cycle when a profiler is attached."""
+        if self.profiler is None:
+            await super()._async_refresh(*args, **kwargs)
+            return
+        with self.profiler.cycle():
+            await super()._async_refresh(*args, **kwargs)
+
     async def _async_update_data(self):
         """Update data via library."""
         LOGGER.debug("Swiss Meteo Warnings - coordinator - _async_update_data")
+        poller = self.poller
         try:
-            return await self.client.async_get_data()
+            data = await poller.async_fetch(self)
+            if poller is not self.poller:
+                # Reconfigured during the fetch, the data is for the previous options
+                data = await self.poller.async_fetch(self)
+        except SwissMeteoWarningsApiClientCommunicationError as exception:
+            self.__failures += 1
+            self.update_interval = self.__backoff_interval()
+            raise UpdateFailed(exception) from exception
         except SwissMeteoWarningsApiClientError as exception:
             raise UpdateFailed(exception) from exception
+
+        self.__failures = 0
+        self.update_interval = self.__adaptive_interval(data)
+        return data
+
+    async def async_restore(self, max_staleness: timedelta) -> bool:
+        """Publish the persisted snapshot if it is recent enough."""
+        data = await self.poller.async_restore()
+        if data is None or dt_util.utcnow() - self.poller.fetched > max_staleness:
+            return False
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - restored data from %s",
+            self.poller.fetched
+        )
+        self.async_set_updated_data(data)
+        return True
+
+    async def async_reconfigure(
+        self,
+        post_code: str,
+        regions: WarningRegionIndex | None,
+        language: str | None,
+        poll_interval: timedelta | None,
+    ) -> None:
+        """Apply new options in place, keeping the entities and the data.
+
+        A new post code, language or region index switches to the poller serving
+        it, publishing its data right away when another entry or the store has
+        it, and refreshing in the background.
+        """
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - reconfigure %s %s %s",
+            post_code, language, poll_interval
+        )
+        previous = self.poller
+        # Acquiring first keeps a poller shared with the previous options alive
+        self.poller = async_acquire_poller(self.hass, post_code, self, regions, language)
+        async_release_poller(previous, self)
+        self.client = self.poller.client
+        self.post_code = post_code
+        self.language = language
+        self.regions = regions
+        self.poll_interval = poll_interval
+
+        if self.poller is previous:
+            if self.data is not None and self.last_update_success:
+                self.update_interval = self.__adaptive_interval(self.data)
+                self._schedule_refresh()
+            return
+        if (data := await self.poller.async_restore()) is not None:
+            self.async_set_updated_data(data)
+        self.hass.async_create_task(self.async_refresh())
+
+    @callback
+    def async_set_updated_data(self, data: SwissMeteoWarningsSnapshot) -> None:
+        """Accept data pushed by the poller and adapt the polling interval."""
+        self.__failures = 0
+        self.update_interval = self.__adaptive_interval(data)
+        super().async_set_updated_data(data)
+
+    def __adaptive_interval(self, data: SwissMeteoWarningsSnapshot) -> timedelta:
+        """Get the interval until the next poll for the received data."""
+        if self.poll_interval is not None:
+            interval = self.poll_interval
+        elif self.data is not None and data.max_level > self.data.max_level:
+            interval = UPDATE_INTERVAL_ESCALATING
+        elif data.max_level > 0:
+            interval = UPDATE_INTERVAL_ACTIVE
+        else:
+            interval = UPDATE_INTERVAL_IDLE
+
+        # Wake up right after a warning starts or ends, it is when updates are published
+        now = dt_util.utcnow()
+        if (boundary := data.timeline.next_boundary(now)) is not None:
+            interval = min(interval, boundary - now + BOUNDARY_POLL_DELAY)
+
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - next update in %s", interval)
+        return interval
+
+    def __backoff_interval(self) -> timedelta:
+        """Get the interval until the next poll after consecutive failures."""
+        interval = min(
+            UPDATE_INTERVAL_ESCALATING * 2 ** min(self.__failures - 1, 10),
+            UPDATE_INTERVAL_BACKOFF_MAX,
+        )
+        interval *= random.uniform(1 - UPDATE_INTERVAL_JITTER, 1 + UPDATE_INTERVAL_JITTER)
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - retry in %s", interval)
+        return interval
+
+    @callback
+    def async_add_refresh_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen to every refresh, even without changes, for diagnostic entities."""
+        self.__refresh_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self.__refresh_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners, unless nothing changed since the last update."""
+        for update_callback in list(self.__refresh_listeners):
+            update_callback()
+        if self.__published is not None:
+            data, success = self.__published
+            if self.data is data and self.last_update_success == success:
+                LOGGER.debug("Swiss Meteo Warnings - coordinator - no change")
+                return
+        self.__published = (self.data, self.last_update_success)
+        self.__schedule_level_change()
+        self.__publish()
+
+    @callback
+    def __publish(self) -> None:
+        """Update the listeners, timing the fan-out."""
+        start = time.perf_counter()
+        super().async_update_listeners()
+        self.client.metrics.observe(STAGE_PUBLISH, time.perf_counter() - start)
+
+    @callback
+    def __schedule_level_change(self) -> None:
+        """Wake up listeners when a validity window makes a level change."""
+        if self.__unsub_level_change is not None:
+            self.__unsub_level_change()
+            self.__unsub_level_change = None
+        if self.data is None:
+            return
+        if (change := self.data.timeline.next_change(dt_util.utcnow())) is not None:
+            LOGGER.debug("Swiss Meteo Warnings - coordinator - next level change at %s", change)
+            self.__unsub_level_change = async_track_point_in_utc_time(
+                self.hass, self.__async_level_change, change
+            )
+
+    @callback
+    def __async_level_change(self, _now: datetime) -> None:
+        """Re-evaluate listeners at a validity window boundary, without polling."""
+        self.__unsub_level_change = None
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - level change")
+        self.__schedule_level_change()
+        self.__publish()
+
+    @callback
+    def async_release(self) -> None:
+        """Release the shared poller."""
+        LOGGER.debug("Swiss Meteo Warnings - coordinator - async_release")
+        if self.__unsub_level_change is not None:
+            self.__unsub_level_change()
+            self.__unsub_level_change = None
+        if self.profiler is not None:
+            self.profiler.remove(self)
+        async_release_poller(self.poller, self)
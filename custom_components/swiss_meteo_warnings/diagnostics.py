@@ -0,0 +1,45 @@
+"""Diagnostics support for swiss_meteo_warnings."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PLACE, CONF_POST_CODE, DOMAIN
+from .coordinator import SwissMeteoWarningsCoordinator
+
+# The post code and place locate the home of the user
+TO_REDACT = {CONF_POST_CODE, CONF_PLACE}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return the state and the metrics of the pipeline of a config entry, without its location."""
+    coordinator: SwissMeteoWarningsCoordinator = hass.data[DOMAIN][entry.entry_id]
+    poller = coordinator.poller
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "coordinator": {
+            "post_code": REDACTED,
+            "update_interval_s": None if coordinator.update_interval is None
+                else coordinator.update_interval.total_seconds(),
+            "last_update_success": coordinator.last_update_success,
+        },
+        "poller": {
+            # Fetched post code and language
+            "key": [REDACTED, poller.key[1]],
+            "subscribers": poller.ref_count,
+            "fetched": None if poller.fetched is None else poller.fetched.isoformat(),
+        },
+        "circuit_breaker": coordinator.client.circuit_breaker.as_dict(),
+        "metrics": coordinator.client.metrics.as_dict(),
+        "warnings": None if coordinator.data is None
+            else [warning.as_dict() for warning in coordinator.data.warnings],
+    }
@@ -0,0 +1,92 @@
+"""Changes between two sets of warnings."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+
+from .swissmeteowarningsclient import SwissMeteoWarning, WarningType
+
+
+class WarningChangeType(str, Enum):
+    """Kinds of changes of a warning."""
+
+    ADDED = "added"
+    REMOVED = "removed"
+    ESCALATED = "escalated"
+    DEESCALATED = "deescalated"
+
+
+@dataclass(frozen=True, slots=True)
+class WarningChange:
+    """Change of a warning, previous is the replaced warning if any."""
+
+    type: WarningChangeType
+    warning: SwissMeteoWarning
+    previous: SwissMeteoWarning | None = None
+
+    def as_event_data(self) -> dict:
+        """Serialize the change as event data, without the bodies of the warning."""
+        data = self.warning.as_dict()
+        del data["html"], data["links"]
+        return {
+            "change": self.type.value,
+            **data,
+            "warning_type": self.warning.type.name.lower(),
+            "previous_level": None if self.previous is None else int(self.previous.level),
+        }
+
+
+def _warning_key(warning: SwissMeteoWarning) -> tuple[WarningType, datetime, datetime]:
+    """Identify a warning by its type and validity window."""
+    return (warning.type, warning.valid_from, warning.valid_to)
+
+
+def _overlap(first: SwissMeteoWarning, second: SwissMeteoWarning) -> bool:
+    """Tell if the validity windows of two warnings overlap."""
+    return first.valid_from < second.valid_to and second.valid_from < first.valid_to
+
+
+def diff_warnings(
+    old: Iterable[SwissMeteoWarning],
+    new: Iterable[SwissMeteoWarning],
+) -> list[WarningChange]:
+    """Compute the changes from the old to the new warnings.
+
+    Warnings are matched by type and validity window, then the remaining ones of
+    the same type with overlapping windows are considered revisions of the same
+    warning: a level change is an escalation or de-escalation, and a revision
+    of the window alone is not a change.
+    """
+    old_by_key = {_warning_key(warning): warning for warning in old}
+    changes = list[WarningChange]()
+    added = dict[WarningType, list[SwissMeteoWarning]]()
+
+    for warning in new:
+        if (previous := old_by_key.pop(_warning_key(warning), None)) is None:
+            added.setdefault(warning.type, []).append(warning)
+        elif warning.level != previous.level:
+            changes.append(_level_change(warning, previous))
+
+    for previous in old_by_key.values():
+        candidates = added.get(previous.type, ())
+        for index, warning in enumerate(candidates):
+            if _overlap(warning, previous):
+                del candidates[index]
+                if warning.level != previous.level:
+                    changes.append(_level_change(warning, previous))
+                break
+        else:
+            changes.append(WarningChange(WarningChangeType.REMOVED, previous))
+
+    for warnings in added.values():
+        changes.extend(WarningChange(WarningChangeType.ADDED, w) for w in warnings)
+    return changes
+
+
+def _level_change(warning: SwissMeteoWarning, previous: SwissMeteoWarning) -> WarningChange:
+    """Build the change of level of a warning."""
+    if warning.level > previous.level:
+        return WarningChange(WarningChangeType.ESCALATED, warning, previous)
+    return WarningChange(WarningChangeType.DEESCALATED, warning, previous)
@@ -2,10 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
 import aiohttp
 import async_timeout
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 
-from .const import LOGGER
+from .const import DOMAIN, LOGGER, STORAGE_VERSION
+from .postcodes import PostCodeIndex
 
 _HEADERS = {
     "Accept":
@@ -21,6 +29,91 @@ _HEADERS = {
 
 _API_URL = "https://nominatim.openstreetmap.org/reverse?format=jsonv2&lat={}&lon={}"
 
+DATA_GEO_DATA_CACHE = f"{DOMAIN}_geo_data_cache"
+# About 100 m, the same address for every location of the rounded cell
+_CACHE_PRECISION = 3
+_CACHE_SIZE = 64
+_CACHE_TTL = 7 * 24 * 3600
+_CACHE_SAVE_DELAY = 10
+
+
+class GeoDataCache:
+    """LRU cache of reverse geocoded addresses, with a TTL and request coalescing."""
+
+    def __init__(self, store: Store | None = None) -> None:
+        """Init class."""
+        self.__store = store
+        # Rounded location -> (expiry timestamp, address)
+        self.__entries = OrderedDict[tuple[float, float], tuple[float, dict | None]]()
+        self.__pending = dict[tuple[float, float], asyncio.Task]()
+
+    async def async_load(self) -> None:
+        """Load the persisted entries."""
+        if self.__store is None or (stored := await self.__store.async_load()) is None:
+            return
+        now = time.time()
+        for latitude, longitude, expiry, address in stored.get("entries", []):
+            if expiry > now:
+                self.__entries[(latitude, longitude)] = (expiry, address)
+
+    async def async_get(
+        self,
+        latitude: float,
+        longitude: float,
+        fetch: Callable[[], Awaitable[dict | None]],
+    ) -> dict | None:
+        """Get the address of a location, fetching it once for concurrent callers."""
+        key = (round(latitude, _CACHE_PRECISION), round(longitude, _CACHE_PRECISION))
+        if (entry := self.__entries.get(key)) is not None:
+            if entry[0] > time.time():
+                LOGGER.debug("Address of %s found in cache", key)
+                self.__entries.move_to_end(key)
+                return entry[1]
+            del self.__entries[key]
+
+        if (task := self.__pending.get(key)) is None:
+            task = self.__pending[key] = asyncio.ensure_future(self.__async_fetch(key, fetch))
+        # One caller giving up must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    async def __async_fetch(
+        self,
+        key: tuple[float, float],
+        fetch: Callable[[], Awaitable[dict | None]],
+    ) -> dict | None:
+        """Fetch and cache an address."""
+        try:
+            address = await fetch()
+        finally:
+            del self.__pending[key]
+
+        self.__entries[key] = (time.time() + _CACHE_TTL, address)
+        while len(self.__entries) > _CACHE_SIZE:
+            self.__entries.popitem(last=False)
+        if self.__store is not None:
+            self.__store.async_delay_save(self.__data_to_store, _CACHE_SAVE_DELAY)
+        return address
+
+    @callback
+    def __data_to_store(self) -> dict:
+        """Serialize the entries."""
+        return {
+            "entries": [
+                [key[0], key[1], expiry, address]
+                for key, (expiry, address) in self.__entries.items()
+            ]
+        }
+
+
+async def async_get_geo_data_cache(hass: HomeAssistant) -> GeoDataCache:
+    """Get the address cache shared by every config flow."""
+    if (cache := hass.data.get(DATA_GEO_DATA_CACHE)) is None:
+        cache = GeoDataCache(Store(hass, STORAGE_VERSION, DATA_GEO_DATA_CACHE))
+        await cache.async_load()
+        cache = hass.data.setdefault(DATA_GEO_DATA_CACHE, cache)
+    return cache
+
+
 class GeoData:
     """Geo Data API Client."""
 
@@ -29,17 +122,40 @@ class GeoData:
         latitude : float,
         longitude : float,
         session : aiohttp.ClientSession,
+        post_codes : PostCodeIndex | None = None,
+        cache : GeoDataCache | None = None,
     ) -> None:
         """Init class."""
         self.__address = None
         self.__latitude = latitude
         self.__longitude = longitude
         self.__session = session
+        self.__post_codes = post_codes
+        self.__cache = cache
 
     async def init_geo_data(self):
-        """Init geo data."""
+        """Init geo data, from the offline post code index when possible."""
         self.__address = None
 
+        if self.__post_codes is not None:
+            post_code = self.__post_codes.nearest(self.__latitude, self.__longitude)
+            if post_code is not None:
+                LOGGER.debug("Post code %s found in the offline index", post_code.post_code)
+                self.__address = {
+                    "postcode": str(post_code.post_code),
+                    "town": post_code.place,
+                }
+                return
+
+        if self.__cache is not None:
+            self.__address = await self.__cache.async_get(
+                self.__latitude, self.__longitude, self.__async_fetch_address
+            )
+        else:
+            self.__address = await self.__async_fetch_address()
+
+    async def __async_fetch_address(self) -> dict | None:
+        """Reverse geocode the location with Nominatim."""
         url = _API_URL.format(self.__latitude, self.__longitude)
         LOGGER.info(url)
         async with async_timeout.timeout(10):
@@ -50,7 +166,7 @@ class GeoData:
                 json="",
             )
             response.raise_for_status()
-            self.__address = (await response.json()).get("address")
+            return (await response.json()).get("address")
 
     def get_place(self):
         """Get the place associated with the address."""
@@ -0,0 +1,291 @@
+"""Append only history of the warnings received for each post code."""
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+from .const import DOMAIN, LOGGER
+from .swissmeteowarningsclient import (
+    VALID_FROM_UNBOUNDED,
+    VALID_TO_UNBOUNDED,
+    SwissMeteoWarning,
+    WarningLevel,
+    WarningType,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+HISTORY_FILE = f"{DOMAIN}.history"
+DATA_HISTORY = f"{DOMAIN}_history"
+
+# Validity windows are stored in seconds since the epoch, 0 and TIMESTAMP_UNBOUNDED
+# standing for unbounded windows
+TIMESTAMP_UNBOUNDED = 0xFFFFFFFF
+
+# Magic and version
+_HEADER = struct.Struct("<4sB3x")
+_MAGIC = b"SMWH"
+_VERSION = 1
+# Post code, type in the low 12 bits with the level and the outlook flag above,
+# valid from and to
+_RECORD = struct.Struct("<HHII")
+_TYPE_MASK = 0x0FFF
+_LEVEL_SHIFT = 12
+_OUTLOOK = 0x8000
+# Post code, type, level and valid from: a later record with the same ones
+# supersedes the earlier, when a warning is extended or shortened
+_IDENTITY = slice(0, 8)
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryRecord:
+    """Warning received for a post code."""
+
+    post_code: int
+    type: WarningType
+    level: WarningLevel
+    outlook: bool
+    valid_from: int
+    valid_to: int
+
+    def as_dict(self) -> dict:
+        """Serialize the record."""
+        return {
+            "post_code": self.post_code,
+            "warning_type": self.type.name.lower(),
+            "level": int(self.level),
+            "outlook": self.outlook,
+            "valid_from": None if self.valid_from == 0 else _to_datetime(self.valid_from),
+            "valid_to": None if self.valid_to == TIMESTAMP_UNBOUNDED
+                else _to_datetime(self.valid_to),
+        }
+
+
+def _to_datetime(timestamp: int) -> str:
+    """Format a timestamp of the history."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def window_timestamp(value: datetime, unbounded: datetime, default: int) -> int:
+    """Get the timestamp of a validity window boundary."""
+    if value is unbounded:
+        return default
+    return min(max(int(value.timestamp()), 0), TIMESTAMP_UNBOUNDED)
+
+
+class _TypeIndex:
+    """Records of a post code and type, sorted by start with the running max end."""
+
+    __slots__ = ("records", "starts", "max_ends", "dirty")
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.records = list[HistoryRecord]()
+        self.starts = list[int]()
+        self.max_ends = list[int]()
+        self.dirty = False
+
+    def overlapping(self, start: int, end: int) -> Iterable[HistoryRecord]:
+        """Get the records whose validity window overlaps [start, end)."""
+        if self.dirty:
+            self.records.sort(key=lambda record: record.valid_from)
+            self.starts = [record.valid_from for record in self.records]
+            self.max_ends = list(accumulate((r.valid_to for r in self.records), max))
+            self.dirty = False
+        # Before first, every window ended before start, from last on they start after end
+        first = bisect_right(self.max_ends, start)
+        last = bisect_left(self.starts, end)
+        return (r for r in self.records[first:last] if r.valid_to > start)
+
+
+class WarningHistory:
+    """Distinct warnings received, one 12 bytes record each, indexed by post code and type."""
+
+    def __init__(self, path: str) -> None:
+        """Init class."""
+        self.path = path
+        self.__records = dict[bytes, tuple[bytes, HistoryRecord]]()
+        self.__index = dict[tuple[int, WarningType], _TypeIndex]()
+        self.__lock = threading.Lock()
+        # Records waiting to be appended by the single writing task
+        self.__pending = bytearray()
+        self.__writing: asyncio.Task | None = None
+        self.__write_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of records."""
+        return len(self.__records)
+
+    def load(self) -> None:
+        """Read the history file, compacting it when most records were superseded.
+
+        This does blocking I/O, run it in the executor.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        except OSError as exception:
+            LOGGER.warning("Swiss Meteo Warnings - history - %s", exception)
+            return
+        if len(data) < _HEADER.size or _HEADER.unpack_from(data) != (_MAGIC, _VERSION):
+            LOGGER.warning("Swiss Meteo Warnings - history - %s is not a history file", self.path)
+            return
+
+        end = len(data) - (len(data) - _HEADER.size) % _RECORD.size
+        latest = dict[bytes, bytes]()
+        for offset in range(_HEADER.size, end, _RECORD.size):
+            packed = data[offset:offset + _RECORD.size]
+            latest[packed[_IDENTITY]] = packed
+        valid = list[bytes]()
+        for packed in latest.values():
+            try:
+                self.__add(packed)
+            except ValueError:
+                continue
+            valid.append(packed)
+        LOGGER.debug("Swiss Meteo Warnings - history - %d records loaded", len(self))
+        if invalid := len(latest) - len(valid):
+            LOGGER.warning(
+                "Swiss Meteo Warnings - history - %d invalid records discarded from %s",
+                invalid, self.path
+            )
+
+        superseded = (end - _HEADER.size) // _RECORD.size - len(latest)
+        if end != len(data) or invalid or superseded > len(valid):
+            LOGGER.debug("Swiss Meteo Warnings - history - compacting, %d records superseded",
+                superseded
+            )
+            self.__rewrite(b"".join(valid))
+
+    def __rewrite(self, records: bytes) -> None:
+        """Replace the history file."""
+        with self.__lock:
+            with open(f"{self.path}.tmp", "wb") as file:
+                file.write(_HEADER.pack(_MAGIC, _VERSION))
+                file.write(records)
+            os.replace(f"{self.path}.tmp", self.path)
+
+    def __add(self, packed: bytes) -> bool:
+        """Index a record, returns False if it is known already.
+
+        Raises ValueError for a record of an unknown type or level.
+        """
+        identity = packed[_IDENTITY]
+        previous = self.__records.get(identity)
+        if previous is not None and previous[0] == packed:
+            return False
+        post_code, kind, valid_from, valid_to = _RECORD.unpack(packed)
+        record = HistoryRecord(
+            post_code,
+            WarningType(kind & _TYPE_MASK),
+            WarningLevel((kind & ~_OUTLOOK) >> _LEVEL_SHIFT),
+            bool(kind & _OUTLOOK),
+            valid_from,
+            valid_to,
+        )
+        if (index := self.__index.get((post_code, record.type))) is None:
+            index = self.__index[post_code, record.type] = _TypeIndex()
+        if previous is not None:
+            index.records.remove(previous[1])
+        self.__records[identity] = (packed, record)
+        index.records.append(record)
+        index.dirty = True
+        return True
+
+    def add(self, post_code: int | str, warnings: Iterable[SwissMeteoWarning]) -> bytes:
+        """Index the warnings of a post code, returns the new records to write."""
+        new = bytearray()
+        for warning in warnings:
+            packed = _RECORD.pack(
+                int(post_code),
+                warning.type
+                | warning.level << _LEVEL_SHIFT
+                | (_OUTLOOK if warning.outlook else 0),
+                window_timestamp(warning.valid_from, VALID_FROM_UNBOUNDED, 0),
+                window_timestamp(warning.valid_to, VALID_TO_UNBOUNDED, TIMESTAMP_UNBOUNDED),
+            )
+            if self.__add(packed):
+                new += packed
+        return bytes(new)
+
+    def write(self, records: bytes) -> None:
+        """Append records to the history file.
+
+        This does blocking I/O, run it in the executor.
+        """
+        with self.__lock:
+            if new_file := not os.path.exists(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as file:
+                if new_file:
+                    file.write(_HEADER.pack(_MAGIC, _VERSION))
+                file.write(records)
+
+    def async_write(self, hass: HomeAssistant, records: bytes) -> None:
+        """Append records to the history file in the background.
+
+        The records are written in order by a single task, the ones received
+        while it writes are appended by its next write.
+        """
+        self.__pending += records
+        if self.__writing is None or self.__writing.done():
+            self.__writing = hass.async_create_task(self.async_flush(hass))
+
+    async def async_flush(self, hass: HomeAssistant) -> None:
+        """Write the records waiting to be appended."""
+        async with self.__write_lock:
+            while self.__pending:
+                records = bytes(self.__pending)
+                self.__pending.clear()
+                try:
+                    await hass.async_add_executor_job(self.write, records)
+                except OSError as exception:
+                    LOGGER.warning("Swiss Meteo Warnings - history - %d records not written: %s",
+                        len(records) // _RECORD.size, exception
+                    )
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        post_codes: Iterable[int | str] | None = None,
+        warning_types: Iterable[WarningType] | None = None,
+        min_level: WarningLevel = WarningLevel.LOW,
+        include_outlook: bool = False,
+    ) -> list[HistoryRecord]:
+        """Get the warnings valid during [start, end), sorted by start."""
+        start = 0 if start is None else int(start.timestamp())
+        end = TIMESTAMP_UNBOUNDED if end is None else int(end.timestamp())
+        post_codes = None if post_codes is None else {int(p) for p in post_codes}
+        warning_types = None if warning_types is None else set(warning_types)
+
+        records = [
+            record
+            for (post_code, warning_type), index in self.__index.items()
+            if (post_codes is None or post_code in post_codes)
+            and (warning_types is None or warning_type in warning_types)
+            for record in index.overlapping(start, end)
+            if record.level >= min_level and (include_outlook or not record.outlook)
+        ]
+        records.sort(key=lambda record: (record.valid_from, record.post_code, record.type))
+        return records
+
+
+async def async_get_warning_history(hass: HomeAssistant) -> WarningHistory:
+    """Get the warning history, loaded once per instance."""
+    if DATA_HISTORY not in hass.data:
+        history = WarningHistory(hass.config.path(".storage", HISTORY_FILE))
+        await hass.async_add_executor_job(history.load)
+        hass.data[DATA_HISTORY] = history
+    return hass.data[DATA_HISTORY]
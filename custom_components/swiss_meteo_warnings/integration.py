@@ -0,0 +1,170 @@
+"""Setup of the swiss_meteo_warnings integration, exported by the package."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE, Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    CONF_LANGUAGE,
+    CONF_MAX_STALENESS,
+    CONF_POLL_INTERVAL,
+    CONF_POST_CODE,
+    CONF_WARNING_REGIONS,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_POLL_INTERVAL,
+    DOMAIN,
+    LOGGER,
+)
+from .coordinator import SwissMeteoWarningsCoordinator
+from .history import async_get_warning_history
+from .lastseen import async_get_sensor_last_seen
+from .poller import async_remove_poller_store
+from .regions import WarningRegionIndex, async_get_warning_region_index
+from .services import async_setup_services
+
+PLATFORMS: list[Platform] = [
+    Platform.SENSOR,
+]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the warning history, the sensor last seen times and the services."""
+    history = await async_get_warning_history(hass)
+    await async_get_sensor_last_seen(hass)
+
+    async def async_flush_history(_event: Event) -> None:
+        """Write the history records still waiting before Home Assistant stops."""
+        await history.async_flush(hass)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, async_flush_history)
+    async_setup_services(hass)
+    return True
+
+# https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up this integration using UI."""
+    LOGGER.debug("Swiss Meteo Warnings - integration - async_setup_entry start")
+    hass.data.setdefault(DOMAIN, {})
+    regions = await _async_get_regions(hass, entry)
+    hass.data[DOMAIN][
+        entry.entry_id
+    ] = coordinator = SwissMeteoWarningsCoordinator(
+        hass=hass,
+        post_code=_post_code(entry),
+        regions=regions,
+        language=entry.options.get(CONF_LANGUAGE),
+        poll_interval=_poll_interval(entry),
+    )
+
+    LOGGER.debug("Swiss Meteo Warnings - integration - refresh")
+    max_staleness = timedelta(
+        minutes=entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+    )
+    try:
+        if await coordinator.async_restore(max_staleness):
+            # Bring the sensors up from the persisted data, refresh in the background
+            hass.async_create_task(coordinator.async_refresh())
+        else:
+            await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.async_release()
+        raise
+
+    LOGGER.debug("Swiss Meteo Warnings - integration - setup")
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    LOGGER.debug("Swiss Meteo Warnings - integration - return")
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry created by a previous version."""
+    LOGGER.debug("Swiss Meteo Warnings - integration - migrate from version %s", entry.version)
+    if entry.version == 1:
+        # Unique ids were <post code>_<key>, colliding between entries of a post code
+        prefix = f"{entry.data[CONF_POST_CODE]}_"
+
+        @callback
+        def migrate_unique_id(entity_entry: er.RegistryEntry) -> dict[str, str] | None:
+            if not entity_entry.unique_id.startswith(prefix):
+                return None
+            key = entity_entry.unique_id.removeprefix(prefix)
+            return {"new_unique_id": f"{entry.entry_id}_{key}"}
+
+        await er.async_migrate_entries(hass, entry.entry_id, migrate_unique_id)
+        entry.version = 2
+        hass.config_entries.async_update_entry(entry)
+    return True
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Handle removal of an entry."""
+    LOGGER.debug("Swiss Meteo Warnings - integration - async_unload_entry")
+    if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        hass.data[DOMAIN].pop(entry.entry_id).async_release()
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted data of an entry no other entry shares."""
+    LOGGER.debug("Swiss Meteo Warnings - integration - async_remove_entry")
+    (await async_get_sensor_last_seen(hass)).async_remove_entry(entry.entry_id)
+    post_code = _post_code(entry)
+    if not any(
+        _post_code(other) == post_code
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        await async_remove_poller_store(
+            hass,
+            post_code,
+            await _async_get_regions(hass, entry),
+            entry.options.get(CONF_LANGUAGE),
+        )
+
+
+def _post_code(entry: ConfigEntry) -> str:
+    """Get the post code of an entry, changed by the options or the configured one."""
+    return entry.options.get(CONF_POST_CODE) or entry.data[CONF_POST_CODE]
+
+
+def _poll_interval(entry: ConfigEntry) -> timedelta | None:
+    """Get the fixed poll interval of an entry, None for the adaptive intervals."""
+    if minutes := entry.options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL):
+        return timedelta(minutes=minutes)
+    return None
+
+
+async def _async_get_regions(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> WarningRegionIndex | None:
+    """Get the warning region index if the entry fetches warnings per region."""
+    if not entry.options.get(CONF_WARNING_REGIONS, False):
+        return None
+    return await async_get_warning_region_index(hass)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the options to the running coordinator, without reloading the entry.
+
+    The sensor platform follows the options of the sensors on its own.
+    """
+    LOGGER.debug("Swiss Meteo Warnings - integration - async_update_options")
+    coordinator: SwissMeteoWarningsCoordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_reconfigure(
+        post_code=_post_code(entry),
+        regions=await _async_get_regions(hass, entry),
+        language=entry.options.get(CONF_LANGUAGE),
+        poll_interval=_poll_interval(entry),
+    )
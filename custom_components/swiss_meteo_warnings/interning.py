@@ -0,0 +1,108 @@
+"""Pool sharing identical warnings, texts and links between snapshots."""
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Iterable
+from typing import TypeVar
+
+from .swissmeteowarningsclient import Link, SwissMeteoWarning
+
+_T = TypeVar("_T")
+
+
+class _RefCounted(dict[_T, list]):
+    """Canonical instance of each value, with the number of its users."""
+
+    def acquire(self, value: _T) -> _T:
+        """Get the canonical instance of a value, counting a new user."""
+        if (entry := self.get(value)) is None:
+            entry = self[value] = [value, 0]
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, value: _T) -> bool:
+        """Count a user less, returns True when the value was dropped."""
+        entry = self[value]
+        entry[1] -= 1
+        if entry[1]:
+            return False
+        del self[value]
+        return True
+
+
+class WarningPool:
+    """Content addressed pool of warnings.
+
+    Neighbouring post codes get the same warnings, and most warnings survive
+    many refreshes: every snapshot acquires its warnings from the pool, so
+    equal warnings are the same object, and their texts, HTML bodies and links
+    are shared with the other warnings using them. A value is dropped when the
+    last snapshot using it releases it.
+    """
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.__warnings = _RefCounted[SwissMeteoWarning]()
+        self.__strings = _RefCounted[str]()
+        self.__links = _RefCounted[Link]()
+
+    def __len__(self) -> int:
+        """Get the number of distinct warnings."""
+        return len(self.__warnings)
+
+    def stats(self) -> dict[str, int]:
+        """Get the number of distinct warnings, strings and links."""
+        return {
+            "warnings": len(self.__warnings),
+            "strings": len(self.__strings),
+            "links": len(self.__links),
+        }
+
+    def acquire(self, warnings: Iterable[SwissMeteoWarning]) -> list[SwissMeteoWarning]:
+        """Get the shared instances of warnings, for a new snapshot."""
+        shared = []
+        for warning in warnings:
+            if (entry := self.__warnings.get(warning)) is None:
+                warning = self.__share_fields(warning)
+                entry = self.__warnings[warning] = [warning, 0]
+            entry[1] += 1
+            shared.append(entry[0])
+        return shared
+
+    def release(self, warnings: Iterable[SwissMeteoWarning]) -> None:
+        """Release the warnings of a dropped snapshot."""
+        for warning in warnings:
+            if self.__warnings.release(warning):
+                self.__release_fields(warning)
+
+    def __share_fields(self, warning: SwissMeteoWarning) -> SwissMeteoWarning:
+        """Build a warning whose texts and links are the shared ones."""
+        return dataclasses.replace(
+            warning,
+            text=self.__acquire_string(warning.text),
+            html=self.__acquire_string(warning.html),
+            links=tuple(
+                self.__links.acquire(Link(
+                    self.__acquire_string(link.text), self.__acquire_string(link.url)
+                ))
+                for link in warning.links
+            ),
+        )
+
+    def __release_fields(self, warning: SwissMeteoWarning) -> None:
+        """Release the texts and links of a dropped warning."""
+        self.__release_string(warning.text)
+        self.__release_string(warning.html)
+        for link in warning.links:
+            self.__links.release(link)
+            self.__release_string(link.text)
+            self.__release_string(link.url)
+
+    def __acquire_string(self, value: str | None) -> str | None:
+        """Get the shared instance of an optional string."""
+        return None if value is None else self.__strings.acquire(value)
+
+    def __release_string(self, value: str | None) -> None:
+        """Release an optional string."""
+        if value is not None:
+            self.__strings.release(value)
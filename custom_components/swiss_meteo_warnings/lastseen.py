@@ -0,0 +1,80 @@
+"""Persisted last time the warning type of each dynamic sensor was seen."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER, RETIRE_CHECK_INTERVAL, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+LAST_SEEN_STORAGE_KEY = f"{DOMAIN}.last_seen"
+DATA_LAST_SEEN = f"{DOMAIN}_last_seen"
+
+
+class SensorLastSeen:
+    """Last seen times by sensor unique id, shared by every entry.
+
+    A time is only saved again once it moved by the interval of the retire
+    checks, the sensors are retired after days.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Init class."""
+        self.__store = Store(hass, STORAGE_VERSION, LAST_SEEN_STORAGE_KEY)
+        self.__last_seen = dict[str, datetime]()
+
+    async def async_load(self) -> None:
+        """Read the persisted times."""
+        if (data := await self.__store.async_load()) is None:
+            return
+        for unique_id, value in data.get("last_seen", {}).items():
+            if (last_seen := dt_util.parse_datetime(value)) is not None:
+                self.__last_seen[unique_id] = last_seen
+        LOGGER.debug("Swiss Meteo Warnings - lastseen - %d sensors loaded", len(self.__last_seen))
+
+    def get(self, unique_id: str) -> datetime | None:
+        """Get the last time the warning type of a sensor was seen."""
+        return self.__last_seen.get(unique_id)
+
+    @callback
+    def async_set(self, unique_id: str, when: datetime) -> None:
+        """Record that the warning type of a sensor was seen."""
+        previous = self.__last_seen.get(unique_id)
+        if previous is not None and when - previous < RETIRE_CHECK_INTERVAL:
+            return
+        self.__last_seen[unique_id] = when
+        self.__store.async_delay_save(self.__data_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_remove(self, unique_id: str) -> None:
+        """Forget a sensor."""
+        if self.__last_seen.pop(unique_id, None) is not None:
+            self.__store.async_delay_save(self.__data_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        """Forget the sensors of a config entry."""
+        prefix = f"{entry_id}_"
+        for unique_id in [key for key in self.__last_seen if key.startswith(prefix)]:
+            self.async_remove(unique_id)
+
+    @callback
+    def __data_to_store(self) -> dict:
+        """Get the data to persist."""
+        return {
+            "last_seen": {
+                unique_id: last_seen.isoformat()
+                for unique_id, last_seen in self.__last_seen.items()
+            },
+        }
+
+
+async def async_get_sensor_last_seen(hass: HomeAssistant) -> SensorLastSeen:
+    """Get the last seen times of the sensors, loaded once per instance."""
+    if DATA_LAST_SEEN not in hass.data:
+        last_seen = SensorLastSeen(hass)
+        await last_seen.async_load()
+        hass.data[DATA_LAST_SEEN] = last_seen
+    return hass.data[DATA_LAST_SEEN]
@@ -0,0 +1,120 @@
+"""Lightweight instrumentation of the fetch, parse and publish pipeline."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+# Upper bounds of the latency buckets, in milliseconds, the last bucket is unbounded
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+STAGE_FETCH = "fetch"
+STAGE_PARSE = "parse"
+STAGE_PUBLISH = "publish"
+
+
+class LatencyHistogram:
+    """Latencies counted in fixed buckets, constant memory and time per sample."""
+
+    __slots__ = ("counts", "count", "total", "max", "last")
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def observe(self, seconds: float) -> None:
+        """Add a sample."""
+        milliseconds = seconds * 1000
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+        self.last = milliseconds
+
+    def quantile(self, quantile: float) -> float | None:
+        """Get the upper bound of the bucket holding a quantile, in milliseconds."""
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Serialize the histogram."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "last_ms": None if self.last is None else round(self.last, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": {
+                f"le_{bound}" if index < len(LATENCY_BUCKETS) else "inf": count
+                for index, (bound, count) in enumerate(
+                    zip((*LATENCY_BUCKETS, None), self.counts)
+                )
+            },
+        }
+
+
+class PipelineMetrics:
+    """Counters and latencies of the requests of an API client."""
+
+    def __init__(self) -> None:
+        """Init class."""
+        self.stages = {
+            stage: LatencyHistogram() for stage in (STAGE_FETCH, STAGE_PARSE, STAGE_PUBLISH)
+        }
+        self.requests = 0
+        self.bytes_received = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_success: datetime | None = None
+        self.last_failure: datetime | None = None
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Add the duration of a stage."""
+        self.stages[stage].observe(seconds)
+
+    def record_success(self) -> None:
+        """Count a successful update."""
+        self.consecutive_failures = 0
+        self.last_success = datetime.now(timezone.utc)
+
+    def record_failure(self) -> None:
+        """Count a failed update."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = datetime.now(timezone.utc)
+
+    def as_dict(self) -> dict:
+        """Serialize the metrics."""
+        now = datetime.now(timezone.utc)
+        return {
+            "stages": {stage: hist.as_dict() for stage, hist in self.stages.items()},
+            "requests": self.requests,
+            "bytes_received": self.bytes_received,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success": None if self.last_success is None
+                else self.last_success.isoformat(),
+            "last_success_age_s": None if self.last_success is None
+                else round((now - self.last_success).total_seconds(), 1),
+            "last_failure": None if self.last_failure is None
+                else self.last_failure.isoformat(),
+        }
@@ -0,0 +1,278 @@
+"""Shared per post code poller for swiss_meteo_warnings."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    EVENT_WARNING_CHANGED,
+    LOGGER,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .diff import diff_warnings
+from .history import DATA_HISTORY
+from .interning import WarningPool
+from .regions import WarningRegionIndex
+from .snapshot import SwissMeteoWarningsSnapshot
+from .swissmeteowarningsclient import SwissMeteoWarning, SwissMeteoWarningsApiClient
+
+if TYPE_CHECKING:
+    from .coordinator import SwissMeteoWarningsCoordinator
+
+# Process wide registry, keyed by (fetched post code, language)
+_POLLERS: dict[tuple[str, str], SwissMeteoWarningsPoller] = {}
+# Warnings of the snapshots of all the pollers
+_WARNING_POOL = WarningPool()
+# Stores of the pollers by storage key, outliving them so that removing the
+# store also cancels the delayed save of a dropped poller
+_STORES: dict[str, Store] = {}
+
+
+class SwissMeteoWarningsPoller:
+    """Fetch pipeline shared by every coordinator watching the same post code."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: tuple[str, str],
+        client: SwissMeteoWarningsApiClient,
+    ) -> None:
+        """Init class."""
+        self.__hass = hass
+        self.key = key
+        self.client = client
+        self.data: SwissMeteoWarningsSnapshot | None = None
+        self.fetched: datetime | None = None
+        self.__warnings: list[SwissMeteoWarning] | None = None
+        self.__coordinators: list[SwissMeteoWarningsCoordinator] = []
+        self.__store = _store(hass, key)
+        self.__stored: tuple[SwissMeteoWarningsSnapshot, list[dict]] | None = None
+        self.__restore_lock = asyncio.Lock()
+        self.__restored = False
+        self.__released = False
+
+    @property
+    def ref_count(self) -> int:
+        """Number of coordinators subscribed to this poller."""
+        return len(self.__coordinators)
+
+    @callback
+    def subscribe(self, coordinator: SwissMeteoWarningsCoordinator) -> None:
+        """Register a coordinator to receive every fetched result."""
+        self.__coordinators.append(coordinator)
+
+    @callback
+    def unsubscribe(self, coordinator: SwissMeteoWarningsCoordinator) -> None:
+        """Unregister a coordinator."""
+        self.__coordinators.remove(coordinator)
+
+    async def async_fetch(
+        self,
+        coordinator: SwissMeteoWarningsCoordinator,
+    ) -> SwissMeteoWarningsSnapshot:
+        """Fetch warnings once and push them to the other subscribers."""
+        LOGGER.debug("Swiss Meteo Warnings - poller - fetch %s for %d subscribers",
+            self.key, self.ref_count
+        )
+        warnings = await self.client.async_get_data()
+        if warnings is not self.__warnings or self.data is None:
+            self.__warnings = warnings
+            previous = self.data
+            self.__set_data(warnings)
+            self.__record_history(self.data)
+            if previous is not None:
+                self.__fire_changes(previous, self.data)
+        data = self.data
+        self.fetched = dt_util.utcnow()
+        self.__store.async_delay_save(self.__data_to_store, STORAGE_SAVE_DELAY)
+
+        # Pushing the result also reschedules the other coordinators, so only
+        # one request per interval reaches the API whatever the number of entries.
+        for subscriber in list(self.__coordinators):
+            if subscriber is not coordinator:
+                subscriber.async_set_updated_data(data)
+
+        return data
+
+    @callback
+    def __fire_changes(
+        self,
+        previous: SwissMeteoWarningsSnapshot,
+        data: SwissMeteoWarningsSnapshot,
+    ) -> None:
+        """Fire an event per changed warning for each subscribed post code."""
+        changes = diff_warnings(previous.warnings, data.warnings)
+        if not changes:
+            return
+        post_codes = dict.fromkeys(str(c.post_code) for c in self.__coordinators)
+        LOGGER.debug("Swiss Meteo Warnings - poller - %d changes for %s",
+            len(changes), list(post_codes)
+        )
+        for change in changes:
+            event_data = change.as_event_data()
+            for post_code in post_codes:
+                self.__hass.bus.async_fire(
+                    EVENT_WARNING_CHANGED, {"post_code": post_code, **event_data}
+                )
+
+    @callback
+    def __record_history(self, data: SwissMeteoWarningsSnapshot) -> None:
+        """Append the new warnings to the history of each subscribed post code."""
+        if (history := self.__hass.data.get(DATA_HISTORY)) is None:
+            return
+        records = b"".join(
+            history.add(post_code, data.warnings)
+            for post_code in dict.fromkeys(str(c.post_code) for c in self.__coordinators)
+        )
+        if records:
+            history.async_write(self.__hass, records)
+
+    async def async_restore(self) -> SwissMeteoWarningsSnapshot | None:
+        """Get the current snapshot, loading the persisted one on first use."""
+        async with self.__restore_lock:
+            if self.data is None and not self.__restored:
+                self.__restored = True
+                await self.__async_load()
+        return self.data
+
+    async def __async_load(self) -> None:
+        """Load the persisted snapshot."""
+        if (stored := await self.__store.async_load()) is None:
+            return
+        try:
+            fetched = dt_util.parse_datetime(stored["fetched"])
+            warnings = [SwissMeteoWarning.from_dict(w) for w in stored["warnings"]]
+        except (KeyError, TypeError, ValueError) as exception:
+            LOGGER.warning("Swiss Meteo Warnings - poller - invalid stored data for %s: %s",
+                self.key, exception
+            )
+            return
+        if fetched is not None and self.data is None:
+            LOGGER.debug("Swiss Meteo Warnings - poller - restored %s fetched at %s",
+                self.key, fetched
+            )
+            self.__set_data(warnings)
+            self.fetched = fetched
+
+    @callback
+    def __set_data(self, warnings: list[SwissMeteoWarning]) -> None:
+        """Replace the snapshot, its warnings being shared through the pool."""
+        if self.__released:
+            self.data = SwissMeteoWarningsSnapshot.from_warnings(warnings)
+            return
+        # The list is updated in place, so that the client holds the shared
+        # warnings too and still tells unchanged warnings by identity.
+        warnings[:] = _WARNING_POOL.acquire(warnings)
+        if self.data is not None:
+            _WARNING_POOL.release(self.data.warnings)
+        self.data = SwissMeteoWarningsSnapshot.from_warnings(warnings)
+
+    @callback
+    def release(self) -> None:
+        """Release the warnings of the snapshot once the poller is dropped."""
+        if not self.__released and self.data is not None:
+            _WARNING_POOL.release(self.data.warnings)
+        self.__released = True
+
+    @callback
+    def __data_to_store(self) -> dict:
+        """Serialize the current snapshot, only once per change."""
+        if self.__stored is None or self.__stored[0] is not self.data:
+            self.__stored = (self.data, [w.as_dict() for w in self.data.warnings])
+        return {
+            "fetched": self.fetched.isoformat(),
+            "warnings": self.__stored[1],
+        }
+
+
+def _poller_key(
+    hass: HomeAssistant,
+    post_code: str,
+    regions: WarningRegionIndex | None,
+    language: str | None,
+) -> tuple[str, str]:
+    """Get the registry key of the poller serving a post code."""
+    if regions is not None:
+        post_code = regions.representative(post_code)
+    return (str(post_code), language or hass.config.language)
+
+
+def _store_key(key: tuple[str, str]) -> str:
+    """Get the storage key of a poller."""
+    return f"{DOMAIN}.{key[0]}_{key[1]}"
+
+
+@callback
+def _store(hass: HomeAssistant, key: tuple[str, str]) -> Store:
+    """Get the store of a poller, the one of a previous poller of the key if any."""
+    store_key = _store_key(key)
+    if (store := _STORES.get(store_key)) is None or store.hass is not hass:
+        store = _STORES[store_key] = Store(hass, STORAGE_VERSION, store_key)
+    return store
+
+
+@callback
+def async_acquire_poller(
+    hass: HomeAssistant,
+    post_code: str,
+    coordinator: SwissMeteoWarningsCoordinator,
+    regions: WarningRegionIndex | None = None,
+    language: str | None = None,
+) -> SwissMeteoWarningsPoller:
+    """Get the shared poller of a post code and subscribe the coordinator to it.
+
+    With a region index, every post code of a warning region shares the poller
+    of the representative post code of the region. The language defaults to the
+    one of Home Assistant.
+    """
+    key = _poller_key(hass, post_code, regions, language)
+    if (poller := _POLLERS.get(key)) is None:
+        LOGGER.debug("Swiss Meteo Warnings - poller - create %s", key)
+        poller = _POLLERS[key] = SwissMeteoWarningsPoller(
+            hass,
+            key,
+            SwissMeteoWarningsApiClient(
+                key[0],
+                key[1],
+                hass.config.country,
+                session=async_get_clientsession(hass),
+            ),
+        )
+    poller.subscribe(coordinator)
+    return poller
+
+
+@callback
+def async_release_poller(
+    poller: SwissMeteoWarningsPoller,
+    coordinator: SwissMeteoWarningsCoordinator,
+) -> None:
+    """Unsubscribe the coordinator and drop the poller after its last user."""
+    poller.unsubscribe(coordinator)
+    if poller.ref_count == 0 and _POLLERS.get(poller.key) is poller:
+        LOGGER.debug("Swiss Meteo Warnings - poller - tear down %s", poller.key)
+        del _POLLERS[poller.key]
+        poller.release()
+
+
+async def async_remove_poller_store(
+    hass: HomeAssistant,
+    post_code: str,
+    regions: WarningRegionIndex | None = None,
+    language: str | None = None,
+) -> None:
+    """Remove the persisted snapshot of a post code, unless another entry polls it."""
+    key = _poller_key(hass, post_code, regions, language)
+    if key in _POLLERS:
+        return
+    # The store of the poller, cancelling its pending delayed save
+    await _store(hass, key).async_remove()
+    _STORES.pop(_store_key(key), None)
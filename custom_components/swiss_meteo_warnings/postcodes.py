@@ -0,0 +1,220 @@
+"""Offline index of Swiss post codes with their centroid and place."""
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+POST_CODES_FILE = f"{DOMAIN}_postcodes.bin"
+# Built by scripts/build_postcodes, the file of the configuration directory overrides it
+POST_CODES_PATH = os.path.join(os.path.dirname(__file__), "postcodes.bin")
+DATA_POST_CODES = f"{DOMAIN}_post_codes"
+
+CANTONS = (
+    "AG", "AI", "AR", "BE", "BL", "BS", "FR", "GE", "GL", "GR", "JU", "LU", "NE",
+    "NW", "OW", "SG", "SH", "SO", "SZ", "TG", "TI", "UR", "VD", "VS", "ZG", "ZH",
+    "FL",
+)
+
+# Magic, version, count, names length
+_HEADER = struct.Struct("<4sBxxxII")
+_MAGIC = b"SMWP"
+_VERSION = 1
+# Coordinates are stored as integers in 1e-5 degrees (about one meter)
+_SCALE = 100_000
+# Grid cell size of the spatial index, in degrees
+_CELL = 0.05
+_KM_PER_DEGREE = 111.195
+
+
+@dataclass(frozen=True)
+class PostCode:
+    """Post code entry of the index."""
+
+    post_code: int
+    place: str
+    canton: str
+    latitude: float
+    longitude: float
+
+
+class PostCodeIndex:
+    """Array backed post code index with a grid for nearest neighbour lookups.
+
+    The binary file holds, after its header, the latitudes, longitudes and name
+    offsets as 32 bits integers, the post codes as 16 bits integers, the canton
+    indexes as bytes and the UTF-8 encoded place names, all sorted by post code.
+    """
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        """Init class from the content of an index file."""
+        magic, version, count, names_length = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not a post code index")
+
+        self.__buffer = buffer
+        view = memoryview(buffer)
+        offset = _HEADER.size
+
+        def column(fmt: str, length: int) -> memoryview:
+            nonlocal offset
+            size = struct.calcsize(fmt) * length
+            data = view[offset:offset + size].cast(fmt)
+            offset += size
+            return data
+
+        self.__latitudes = column("i", count)
+        self.__longitudes = column("i", count)
+        self.__name_offsets = column("I", count + 1)
+        self.__post_codes = column("H", count)
+        self.__cantons = column("B", count)
+        self.__names = view[offset:offset + names_length]
+
+        self.__grid = dict[tuple[int, int], list[int]]()
+        for index in range(count):
+            self.__grid.setdefault(self.__cell(
+                self.__latitudes[index] / _SCALE,
+                self.__longitudes[index] / _SCALE,
+            ), []).append(index)
+
+    @classmethod
+    def load(
+        cls,
+        path: str = POST_CODES_PATH,
+        use_mmap: bool = False,
+    ) -> PostCodeIndex | None:
+        """Load an index file, None if it is missing or invalid.
+
+        This does blocking I/O, run it in the executor.
+        """
+        try:
+            with open(path, "rb") as file:
+                if use_mmap:
+                    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    buffer = file.read()
+            return cls(buffer)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, IndexError, struct.error) as exception:
+            LOGGER.warning("Swiss Meteo Warnings - post codes - invalid %s: %s", path, exception)
+            return None
+
+    @staticmethod
+    def write(path: str, post_codes: Iterable[PostCode]) -> int:
+        """Write an index file, returns the number of post codes."""
+        entries = sorted(post_codes, key=lambda entry: entry.post_code)
+        names = bytearray()
+        name_offsets = array("I", [0])
+        for entry in entries:
+            names += entry.place.encode()
+            name_offsets.append(len(names))
+
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(entries), len(names)))
+            file.write(array("i", (round(e.latitude * _SCALE) for e in entries)).tobytes())
+            file.write(array("i", (round(e.longitude * _SCALE) for e in entries)).tobytes())
+            file.write(name_offsets.tobytes())
+            file.write(array("H", (e.post_code for e in entries)).tobytes())
+            file.write(array("B", (CANTONS.index(e.canton) for e in entries)).tobytes())
+            file.write(names)
+        return len(entries)
+
+    def __len__(self) -> int:
+        """Get the number of post codes."""
+        return len(self.__post_codes)
+
+    def __entry(self, index: int) -> PostCode:
+        """Build the entry at an index."""
+        return PostCode(
+            post_code=self.__post_codes[index],
+            place=bytes(self.__names[
+                self.__name_offsets[index]:self.__name_offsets[index + 1]
+            ]).decode(),
+            canton=CANTONS[self.__cantons[index]],
+            latitude=self.__latitudes[index] / _SCALE,
+            longitude=self.__longitudes[index] / _SCALE,
+        )
+
+    @staticmethod
+    def __cell(latitude: float, longitude: float) -> tuple[int, int]:
+        """Get the grid cell of a location."""
+        return (math.floor(latitude / _CELL), math.floor(longitude / _CELL))
+
+    def get(self, post_code: int) -> PostCode | None:
+        """Get a post code entry."""
+        index = bisect_left(self.__post_codes, int(post_code))
+        if index < len(self.__post_codes) and self.__post_codes[index] == int(post_code):
+            return self.__entry(index)
+        return None
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance: float = 10,
+    ) -> PostCode | None:
+        """Get the post code with the closest centroid within max_distance km."""
+        cos_latitude = math.cos(math.radians(latitude))
+        lat_scale = _KM_PER_DEGREE / _SCALE
+        lon_scale = lat_scale * cos_latitude
+        # Smallest side of a cell, in km
+        cell_size = _CELL * _KM_PER_DEGREE * cos_latitude
+        center = self.__cell(latitude, longitude)
+        target_lat = latitude * _SCALE
+        target_lon = longitude * _SCALE
+
+        best, best_distance = None, max_distance
+        for ring in range(math.ceil(max_distance / cell_size) + 2):
+            # Cells of this ring are at least (ring - 1) cells away from the location
+            if (ring - 1) * cell_size > best_distance:
+                break
+            for d_lat in range(-ring, ring + 1):
+                for d_lon in range(-ring, ring + 1):
+                    if max(abs(d_lat), abs(d_lon)) != ring:
+                        continue
+                    for index in self.__grid.get((center[0] + d_lat, center[1] + d_lon), ()):
+                        distance = math.hypot(
+                            (self.__latitudes[index] - target_lat) * lat_scale,
+                            (self.__longitudes[index] - target_lon) * lon_scale,
+                        )
+                        if distance <= best_distance:
+                            best, best_distance = index, distance
+
+        return None if best is None else self.__entry(best)
+
+
+def _load_post_codes(path: str) -> PostCodeIndex | None:
+    """Load the index of the configuration directory, else the bundled one."""
+    post_codes = PostCodeIndex.load(path, use_mmap=True)
+    if post_codes is None:
+        post_codes = PostCodeIndex.load(POST_CODES_PATH, use_mmap=True)
+    return post_codes
+
+
+async def async_get_post_code_index(hass: HomeAssistant) -> PostCodeIndex | None:
+    """Get the post code index, loaded once per instance.
+
+    A missing index is looked up again on the next call, so an index built
+    later is used without restarting.
+    """
+    if (post_codes := hass.data.get(DATA_POST_CODES)) is None:
+        post_codes = await hass.async_add_executor_job(
+            _load_post_codes, hass.config.path(POST_CODES_FILE)
+        )
+        if post_codes is None:
+            return None
+        LOGGER.debug("Swiss Meteo Warnings - post codes - %d post codes loaded", len(post_codes))
+        hass.data[DATA_POST_CODES] = post_codes
+    return post_codes
@@ -0,0 +1,109 @@
+"""On demand profiling of refresh cycles."""
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .coordinator import SwissMeteoWarningsCoordinator
+
+# Number of functions listed in the text report
+REPORT_LIMIT = 60
+
+
+class RefreshProfiler:
+    """Profile the next refresh cycles of coordinators with cProfile.
+
+    The event loop thread is profiled while at least one cycle runs, so the
+    request, the decoding and the listener updates are all accounted for, along
+    with whatever else the loop runs during the awaits.
+    """
+
+    def __init__(
+        self,
+        coordinators: Iterable[SwissMeteoWarningsCoordinator],
+        cycles: int,
+        on_done: Callable[[RefreshProfiler], None],
+    ) -> None:
+        """Init class and attach it to the coordinators."""
+        self.cycles = cycles
+        self.profiled = 0
+        self.__remaining = cycles
+        self.__running = 0
+        self.__done = False
+        self.__on_done = on_done
+        self.__profile = cProfile.Profile()
+        self.__coordinators = list(coordinators)
+        for coordinator in self.__coordinators:
+            coordinator.profiler = self
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        """Profile a refresh cycle."""
+        if self.__running == 0:
+            try:
+                self.__profile.enable()
+            except ValueError as exception:
+                # Another profiler is active on this thread
+                LOGGER.warning("Swiss Meteo Warnings - profiler - %s", exception)
+                self.__finish()
+                yield
+                return
+        self.__running += 1
+        try:
+            yield
+        finally:
+            self.__running -= 1
+            self.__remaining -= 1
+            self.profiled += 1
+            if self.__running == 0:
+                self.__profile.disable()
+                # Done, or the last coordinator was unloaded during the cycle
+                if self.__remaining <= 0 or not self.__coordinators:
+                    self.__finish()
+
+    def remove(self, coordinator: SwissMeteoWarningsCoordinator) -> None:
+        """Stop profiling an unloaded coordinator, finishing after the last one."""
+        if coordinator.profiler is self:
+            coordinator.profiler = None
+            self.__coordinators.remove(coordinator)
+        if not self.__coordinators and self.__running == 0:
+            self.__finish()
+
+    def __finish(self) -> None:
+        """Detach from the coordinators and report, once."""
+        if self.__done:
+            return
+        self.__done = True
+        self.detach()
+        self.__on_done(self)
+
+    def detach(self) -> None:
+        """Stop profiling the cycles of the coordinators."""
+        for coordinator in self.__coordinators:
+            if coordinator.profiler is self:
+                coordinator.profiler = None
+        self.__coordinators.clear()
+
+    def write(self, path: str) -> None:
+        """Write the pstats file, usable by snakeviz or flameprof, and a text report.
+
+        This does blocking I/O, run it in the executor.
+        """
+        self.__profile.dump_stats(f"{path}.prof")
+        report = io.StringIO()
+        stats = pstats.Stats(self.__profile, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LIMIT)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_LIMIT)
+        with open(f"{path}.txt", "w", encoding="utf-8") as file:
+            file.write(f"{self.profiled} refresh cycles\n")
+            file.write(report.getvalue())
+        LOGGER.info("Swiss Meteo Warnings - profiler - %d refresh cycles written to %s.prof",
+            self.profiled, path
+        )
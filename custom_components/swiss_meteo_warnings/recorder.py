@@ -0,0 +1,12 @@
+"""Recorder platform of swiss_meteo_warnings."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, callback
+
+from .sensor import DETAIL_ATTRIBUTES
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Exclude the warning details from being recorded in the database."""
+    return set(DETAIL_ATTRIBUTES)
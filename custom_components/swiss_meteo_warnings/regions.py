@@ -0,0 +1,91 @@
+"""Index of the warning region of each post code."""
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+WARNING_REGIONS_FILE = f"{DOMAIN}_regions.json"
+# Built by scripts/build_regions, the file of the configuration directory overrides it
+BUNDLED_WARNING_REGIONS_PATH = os.path.join(os.path.dirname(__file__), "regions.json")
+DATA_WARNING_REGIONS = f"{DOMAIN}_regions"
+
+
+class WarningRegionIndex:
+    """Map post codes to the warning region they belong to.
+
+    MeteoSwiss issues warnings per warning region, so every post code of a region
+    gets the same warnings: only one of them, the smallest, needs to be fetched.
+    """
+
+    def __init__(self, regions: Mapping[str, Iterable[int | str]]) -> None:
+        """Init class from post codes grouped by region."""
+        self.__regions = dict[str, str]()
+        self.__representatives = dict[str, str]()
+        for region, post_codes in regions.items():
+            post_codes = sorted(str(post_code) for post_code in post_codes)
+            if not post_codes:
+                continue
+            self.__representatives[region] = post_codes[0]
+            for post_code in post_codes:
+                self.__regions[post_code] = region
+
+    @classmethod
+    def load(cls, path: str) -> WarningRegionIndex | None:
+        """Load a JSON file of the form {"regions": {"<region>": [<post code>, ...]}}.
+
+        This does blocking I/O, run it in the executor.
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                return cls(json.load(file)["regions"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exception:
+            LOGGER.warning("Swiss Meteo Warnings - regions - invalid %s: %s", path, exception)
+            return None
+
+    def __len__(self) -> int:
+        """Get the number of regions."""
+        return len(self.__representatives)
+
+    def region(self, post_code: int | str) -> str | None:
+        """Get the warning region of a post code."""
+        return self.__regions.get(str(post_code))
+
+    def representative(self, post_code: int | str) -> str:
+        """Get the post code to fetch for a post code, itself when its region is unknown."""
+        if (region := self.region(post_code)) is None:
+            return str(post_code)
+        return self.__representatives[region]
+
+
+def _load_warning_regions(path: str) -> WarningRegionIndex | None:
+    """Load the region index of the configuration directory, else the bundled one."""
+    regions = WarningRegionIndex.load(path)
+    if regions is None:
+        regions = WarningRegionIndex.load(BUNDLED_WARNING_REGIONS_PATH)
+    return regions
+
+
+async def async_get_warning_region_index(hass: HomeAssistant) -> WarningRegionIndex | None:
+    """Get the region index, loaded once per instance.
+
+    A missing index is looked up again on the next call, so a mapping built
+    later is used without restarting.
+    """
+    if (regions := hass.data.get(DATA_WARNING_REGIONS)) is None:
+        regions = await hass.async_add_executor_job(
+            _load_warning_regions, hass.config.path(WARNING_REGIONS_FILE)
+        )
+        if regions is None:
+            return None
+        LOGGER.debug("Swiss Meteo Warnings - regions - %d warning regions loaded", len(regions))
+        hass.data[DATA_WARNING_REGIONS] = regions
+    return regions
@@ -1,22 +1,93 @@
 """Definition of Swiss Meteo Warning sensor platform."""
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, LOGGER
-from .swissmeteowarningsclient import SwissMeteoWarning, WarningType, WarningLevel
+from .const import (
+    CONF_DYNAMIC_SENSORS,
+    CONF_RETIRE_AFTER,
+    CONF_WARNING_TYPES,
+    DEFAULT_RETIRE_AFTER,
+    DOMAIN,
+    LOGGER,
+    NAME,
+    RETIRE_CHECK_INTERVAL,
+)
+from .metrics import STAGE_FETCH, PipelineMetrics
+from .swissmeteowarningsclient import (
+    VALID_FROM_UNBOUNDED,
+    VALID_TO_UNBOUNDED,
+    WarningType,
+)
 
 from .coordinator import SwissMeteoWarningsCoordinator
+from .lastseen import SensorLastSeen, async_get_sensor_last_seen
+from .snapshot import SwissMeteoWarningsSnapshot
+
+# Details of the warning setting the level of a sensor. Excluded from the recorder,
+# see recorder.py, the full texts are served by the get_warning_details service.
+ATTR_TEXT = "text"
+ATTR_SUMMARY = "summary"
+ATTR_OUTLOOK = "outlook"
+ATTR_VALID_FROM = "valid_from"
+ATTR_VALID_TO = "valid_to"
+ATTR_LINKS = "links"
+ATTR_WARNINGS = "warnings"
+DETAIL_ATTRIBUTES = frozenset({
+    ATTR_TEXT, ATTR_SUMMARY, ATTR_OUTLOOK, ATTR_VALID_FROM, ATTR_VALID_TO, ATTR_LINKS,
+    ATTR_WARNINGS,
+})
+MAX_TEXT_LENGTH = 255
+MAX_LINKS = 5
+
+
+def _truncate(text: str | None) -> str | None:
+    """Cap a text to MAX_TEXT_LENGTH characters."""
+    if text is None or len(text) <= MAX_TEXT_LENGTH:
+        return text
+    return text[:MAX_TEXT_LENGTH - 1].rstrip() + "…"
+
+
+def warning_attributes(
+    snapshot: SwissMeteoWarningsSnapshot,
+    warning_type: WarningType,
+    when: datetime,
+) -> dict[str, Any]:
+    """Get the detail attributes of a warning type, sized for the state machine."""
+    count = snapshot.count(warning_type)
+    if (warning := snapshot.warning(warning_type, when)) is None:
+        return {ATTR_WARNINGS: count}
+    return {
+        ATTR_TEXT: _truncate(warning.text),
+        ATTR_SUMMARY: _truncate(snapshot.summary(warning)),
+        ATTR_OUTLOOK: warning.outlook,
+        ATTR_VALID_FROM: None if warning.valid_from is VALID_FROM_UNBOUNDED
+            else warning.valid_from.isoformat(),
+        ATTR_VALID_TO: None if warning.valid_to is VALID_TO_UNBOUNDED
+            else warning.valid_to.isoformat(),
+        ATTR_LINKS: [link.as_dict() for link in warning.links[:MAX_LINKS]],
+        ATTR_WARNINGS: count,
+    }
+
 
 @dataclass
 class SwissMeteoWarningsEntityDescription(SensorEntityDescription):
@@ -86,6 +157,70 @@ SENSOR_TYPES: list[SwissMeteoWarningsEntityDescription] = [
     ),
 ]
 
+# Only created by the dynamic mode, for the warning types the client does not know
+UNKNOWN_SENSOR_TYPE = SwissMeteoWarningsEntityDescription(
+    key=WarningType.UNKNOWN,
+    translation_key="unknown",
+    state_class=SensorStateClass.MEASUREMENT,
+    icon="mdi:alert",
+)
+
+
+@dataclass
+class SwissMeteoWarningsDiagnosticEntityRequiredKeysMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[PipelineMetrics], int | float | datetime | None]
+
+
+@dataclass
+class SwissMeteoWarningsDiagnosticEntityDescription(
+    SensorEntityDescription, SwissMeteoWarningsDiagnosticEntityRequiredKeysMixin
+):
+    """Describes Swiss Meteo Warnings diagnostic sensor entity."""
+
+
+# Disabled by default, they are written after every request
+DIAGNOSTIC_SENSOR_TYPES: list[SwissMeteoWarningsDiagnosticEntityDescription] = [
+    SwissMeteoWarningsDiagnosticEntityDescription(
+        key="last_success",
+        name="Last success",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda metrics: metrics.last_success,
+    ),
+    SwissMeteoWarningsDiagnosticEntityDescription(
+        key="consecutive_failures",
+        name="Consecutive failures",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:alert-circle-outline",
+        value_fn=lambda metrics: metrics.consecutive_failures,
+    ),
+    SwissMeteoWarningsDiagnosticEntityDescription(
+        key="fetch_duration",
+        name="Fetch duration",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda metrics: None if metrics.stages[STAGE_FETCH].last is None
+            else round(metrics.stages[STAGE_FETCH].last),
+    ),
+    SwissMeteoWarningsDiagnosticEntityDescription(
+        key="bytes_received",
+        name="Bytes received",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value_fn=lambda metrics: metrics.bytes_received,
+    ),
+    SwissMeteoWarningsDiagnosticEntityDescription(
+        key="cache_hits",
+        name="Cache hits",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:cached",
+        value_fn=lambda metrics: metrics.cache_hits + metrics.not_modified + metrics.unchanged,
+    ),
+]
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -97,12 +232,184 @@ async def async_setup_entry(
 
     coordinator = hass.data[DOMAIN][config.entry_id]
 
-    entities: list[SwissMeteoWarningSensor] = []
+    config.async_on_unload(SwissMeteoWarningsSensors(
+        hass, config, coordinator, async_add_entities, await async_get_sensor_last_seen(hass)
+    ).async_start())
+    async_add_entities(
+        SwissMeteoWarningsDiagnosticSensor(coordinator, description, config.entry_id)
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
+
+
+class SwissMeteoWarningsSensors:
+    """Add and remove the warning sensors of an entry as its warnings and options change.
+
+    Every enabled warning type has a sensor, unless in dynamic mode where the
+    sensor of a type is created when a warning of this type first appears, and
+    removed when none was seen for retire_after. Sensors created before are
+    brought back at startup from the entity registry, with the persisted time
+    their warning type was last seen.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config: ConfigEntry,
+        coordinator: SwissMeteoWarningsCoordinator,
+        async_add_entities: AddEntitiesCallback,
+        last_seen: SensorLastSeen,
+    ) -> None:
+        """Init class."""
+        self.__hass = hass
+        self.__config = config
+        self.__coordinator = coordinator
+        self.__async_add_entities = async_add_entities
+        self.__descriptions = {
+            description.key: description for description in (*SENSOR_TYPES, UNKNOWN_SENSOR_TYPE)
+        }
+        self.__sensors = dict[WarningType, SwissMeteoWarningSensor]()
+        self.__last_seen = dict[WarningType, datetime]()
+        self.__persisted_last_seen = last_seen
+        self.__dynamic = False
+        self.__retire_after: timedelta | None = None
+        self.__enabled: frozenset[WarningType] | None = None
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Add the sensors and follow the updates and the options, returns the stop."""
+        self.__read_options()
+        if self.__dynamic:
+            prefix = f"{self.__config.entry_id}_"
+            self.__add_sensors(
+                WarningType[entry.unique_id.removeprefix(prefix)]
+                for entry in er.async_entries_for_config_entry(
+                    er.async_get(self.__hass), self.__config.entry_id
+                )
+                if entry.unique_id.removeprefix(prefix) in WarningType.__members__
+            )
+        self.__sync_sensors()
+
+        unsubscribes = [
+            self.__coordinator.async_add_listener(self.__handle_update),
+            self.__config.add_update_listener(self.__async_options_updated),
+            async_track_time_interval(self.__hass, self.__retire_idle, RETIRE_CHECK_INTERVAL),
+        ]
+
+        @callback
+        def stop() -> None:
+            for unsubscribe in unsubscribes:
+                unsubscribe()
+
+        return stop
+
+    def __read_options(self) -> None:
+        """Read the options of the sensors."""
+        options = self.__config.options
+        self.__dynamic = options.get(CONF_DYNAMIC_SENSORS, False)
+        retire_after = options.get(CONF_RETIRE_AFTER, DEFAULT_RETIRE_AFTER)
+        self.__retire_after = timedelta(days=retire_after) if retire_after else None
+        enabled = options.get(CONF_WARNING_TYPES)
+        self.__enabled = None if enabled is None else frozenset(
+            WarningType[name.upper()] for name in enabled
+        )
+
+    def __enabled_type(self, warning_type: WarningType) -> bool:
+        """Check whether a warning type may have a sensor."""
+        return self.__enabled is None or warning_type in self.__enabled
+
+    async def __async_options_updated(self, _hass: HomeAssistant, _config: ConfigEntry) -> None:
+        """Add and remove sensors for the new options, in place."""
+        self.__read_options()
+        for warning_type in list(self.__sensors):
+            if not self.__enabled_type(warning_type):
+                self.__remove_sensor(warning_type)
+        self.__sync_sensors()
+
+    @callback
+    def __sync_sensors(self) -> None:
+        """Add the missing sensors of the enabled types."""
+        if self.__dynamic:
+            self.__handle_update()
+        else:
+            # UNKNOWN only when explicitly enabled
+            self.__add_sensors(
+                warning_type for warning_type in self.__descriptions
+                if warning_type is not WarningType.UNKNOWN or self.__enabled is not None
+            )
+
+    @callback
+    def __handle_update(self) -> None:
+        """Add the sensors of the warning types seen for the first time."""
+        snapshot: SwissMeteoWarningsSnapshot | None = self.__coordinator.data
+        if snapshot is None or not self.__dynamic:
+            return
+        now = dt_util.utcnow()
+        types = {warning.type for warning in snapshot.warnings}
+        for warning_type in types:
+            self.__seen(warning_type, now)
+        self.__add_sensors(types)
 
-    for description in SENSOR_TYPES:
-        entities.append(SwissMeteoWarningSensor(coordinator, description))
+    def __unique_id(self, warning_type: WarningType) -> str:
+        """Get the unique id of the sensor of a warning type."""
+        return f"{self.__config.entry_id}_{warning_type.name}"
+
+    @callback
+    def __seen(self, warning_type: WarningType, now: datetime) -> None:
+        """Record that a warning of a type was published."""
+        self.__last_seen[warning_type] = now
+        self.__persisted_last_seen.async_set(self.__unique_id(warning_type), now)
+
+    @callback
+    def __add_sensors(self, types: Iterable[WarningType]) -> None:
+        """Add the sensors of enabled warning types that have none."""
+        now = dt_util.utcnow()
+        sensors = []
+        for warning_type in types:
+            if warning_type in self.__sensors or not self.__enabled_type(warning_type):
+                continue
+            LOGGER.debug("Swiss Meteo Warnings - sensor - add %s for %s",
+                warning_type.name, self.__coordinator.post_code
+            )
+            # Restored sensors keep the time persisted before the restart
+            self.__last_seen.setdefault(
+                warning_type,
+                self.__persisted_last_seen.get(self.__unique_id(warning_type)) or now,
+            )
+            sensors.append(self.__sensors.setdefault(warning_type, SwissMeteoWarningSensor(
+                self.__coordinator,
+                self.__descriptions[warning_type],
+                self.__config.entry_id,
+            )))
+        if sensors:
+            self.__async_add_entities(sensors)
+
+    @callback
+    def __remove_sensor(self, warning_type: WarningType) -> None:
+        """Remove the sensor of a warning type and its registry entry."""
+        LOGGER.debug("Swiss Meteo Warnings - sensor - remove %s for %s",
+            warning_type.name, self.__coordinator.post_code
+        )
+        self.__last_seen.pop(warning_type, None)
+        self.__persisted_last_seen.async_remove(self.__unique_id(warning_type))
+        sensor = self.__sensors.pop(warning_type)
+        # Removing the registry entry also removes the entity from its platform
+        if sensor.registry_entry is not None:
+            er.async_get(self.__hass).async_remove(sensor.entity_id)
+        elif sensor.hass is not None:
+            self.__hass.async_create_task(sensor.async_remove())
 
-    async_add_entities(entities)
+    @callback
+    def __retire_idle(self, now: datetime) -> None:
+        """Remove the dynamic sensors whose warning type was not seen for retire_after."""
+        if not self.__dynamic or self.__retire_after is None:
+            return
+        # Unchanged refreshes skip the listeners, the warnings still published are seen
+        if (snapshot := self.__coordinator.data) is not None:
+            for warning in snapshot.warnings:
+                self.__seen(warning.type, now)
+        for warning_type, last_seen in list(self.__last_seen.items()):
+            if now - last_seen >= self.__retire_after and warning_type in self.__sensors:
+                self.__remove_sensor(warning_type)
 
 
 class SwissMeteoWarningSensor(CoordinatorEntity, SensorEntity):
@@ -110,38 +417,94 @@ class SwissMeteoWarningSensor(CoordinatorEntity, SensorEntity):
 
     LOGGER.debug("Swiss Meteo Warnings - sensor")
     _attr_has_entity_name = True
+    # Home Assistant 2024.1 and later, recorder.py for the previous versions
+    _unrecorded_attributes = DETAIL_ATTRIBUTES
 
     def __init__(
         self,
         coordinator: SwissMeteoWarningsCoordinator,
         description: SwissMeteoWarningsEntityDescription,
+        entry_id: str,
     ) -> None:
-        """Initialize a single sensor."""
+        """Initialize a single sensor, identified by its config entry."""
         LOGGER.debug("Swiss Meteo Warnings - sensor - __init__")
         super().__init__(coordinator)
         self.entity_description: SwissMeteoWarningsEntityDescription = description
 
-        #self._attr_device_info = coordinator.client.post_code
-        self._attr_unique_id = f"{coordinator.client.post_code}_{description.key.name}"
+        #self._attr_device_info = coordinator.post_code
+        self._attr_unique_id = f"{entry_id}_{description.key.name}"
+        self._attr_extra_state_attributes = {}
+        self._update_level()
+        self.__written = (
+            self._attr_native_value, self.available, self._attr_extra_state_attributes
+        )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         LOGGER.debug("Swiss Meteo Warnings - sensor - _handle_coordinator_update")
-        warnings = list[SwissMeteoWarning](self.coordinator.data)
+        self._update_level()
+
+        # Unchanged attributes are not written again
+        written = (self._attr_native_value, self.available, self._attr_extra_state_attributes)
+        if written == self.__written:
+            return
+        self.__written = written
+        self.async_write_ha_state()
 
-        warning_level = WarningLevel.NONE
-        if len(warnings) > 0:
-            warning = next((w for w in warnings if w.type is self.entity_description.key), None)
-            if warning is not None:
-                warning_level = warning.level
+    def _update_level(self) -> None:
+        """Compute the warning level and its details from the coordinator snapshot."""
+        snapshot: SwissMeteoWarningsSnapshot | None = self.coordinator.data
+        if snapshot is None:
+            return
 
-        LOGGER.debug("Swiss Meteo Warnings - sensor - level")
+        warning_type = self.entity_description.key
+        now = dt_util.utcnow()
+        warning_level = snapshot.level(warning_type, now)
         self._attr_native_value = int(warning_level)
+        self._attr_extra_state_attributes = warning_attributes(snapshot, warning_type, now)
         LOGGER.debug("%s is %s (%s)", self.entity_description.key.name,
             warning_level.name,
             self._attr_native_value
         )
 
-        self.async_write_ha_state()
 
+class SwissMeteoWarningsDiagnosticSensor(SensorEntity):
+    """Metric of the fetch pipeline of a coordinator, updated after every refresh."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: SwissMeteoWarningsCoordinator,
+        description: SwissMeteoWarningsDiagnosticEntityDescription,
+        entry_id: str,
+    ) -> None:
+        """Initialize a single sensor, identified by its config entry."""
+        self.coordinator = coordinator
+        self.entity_description: SwissMeteoWarningsDiagnosticEntityDescription = description
+        self._attr_unique_id = f"{entry_id}_{description.key}"
+        self._attr_native_value = description.value_fn(coordinator.client.metrics)
+
+    @property
+    def name(self) -> str:
+        """Get the name, with the post code of the options if they changed it."""
+        return f"{NAME} {self.coordinator.post_code} {self.entity_description.name}"
+
+    async def async_added_to_hass(self) -> None:
+        """Listen to the refreshes of the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_refresh_listener(self._handle_refresh)
+        )
+
+    @callback
+    def _handle_refresh(self) -> None:
+        """Write the metric when it changed."""
+        value = self.entity_description.value_fn(self.coordinator.client.metrics)
+        if value == self._attr_native_value:
+            return
+        self._attr_native_value = value
+        self.async_write_ha_state()
@@ -0,0 +1,336 @@
+"""Services of swiss_meteo_warnings."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.const import ATTR_ENTITY_ID, Platform
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .aggregate import EXPORT_FORMATS, WarningColumns
+from .const import DOMAIN, LOGGER
+from .coordinator import SwissMeteoWarningsCoordinator
+from .history import DATA_HISTORY, WarningHistory
+from .postcodes import async_get_post_code_index
+from .profiler import RefreshProfiler
+from .regions import async_get_warning_region_index
+from .swissmeteowarningsclient import WarningLevel, WarningType
+
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+SERVICE_QUERY_HISTORY = "query_history"
+SERVICE_SUMMARIZE_WARNINGS = "summarize_warnings"
+SERVICE_EXPORT_WARNINGS = "export_warnings"
+SERVICE_GET_WARNING_DETAILS = "get_warning_details"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_CYCLES = "cycles"
+ATTR_REFRESH = "refresh"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_POST_CODE = "post_code"
+ATTR_WARNING_TYPE = "warning_type"
+ATTR_MIN_LEVEL = "min_level"
+ATTR_INCLUDE_OUTLOOK = "include_outlook"
+ATTR_LIMIT = "limit"
+ATTR_GROUP_BY = "group_by"
+ATTR_ACTIVE = "active"
+ATTR_FORMAT = "format"
+ATTR_HOURS = "hours"
+
+GROUP_BY_ALL = "all"
+GROUP_BY_CANTON = "canton"
+GROUP_BY_REGION = "region"
+GROUP_BY_POST_CODE = "post_code"
+
+DATA_PROFILER = f"{DOMAIN}_profiler"
+
+PROFILE_REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CYCLES, default=3): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_REFRESH, default=True): cv.boolean,
+    }
+)
+
+QUERY_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_POST_CODE): vol.All(cv.ensure_list, [cv.positive_int]),
+        vol.Optional(ATTR_WARNING_TYPE): vol.All(
+            cv.ensure_list,
+            [vol.All(vol.Upper, vol.In(WarningType.__members__), WarningType.__getitem__)],
+        ),
+        vol.Optional(ATTR_MIN_LEVEL, default=WarningLevel.LOW): vol.All(
+            vol.Coerce(int), vol.Range(min=WarningLevel.LOW, max=WarningLevel.HIGHEST)
+        ),
+        vol.Optional(ATTR_INCLUDE_OUTLOOK, default=False): cv.boolean,
+        vol.Optional(ATTR_LIMIT, default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=10000)
+        ),
+    }
+)
+
+SUMMARIZE_WARNINGS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_GROUP_BY, default=GROUP_BY_ALL): vol.In(
+            (GROUP_BY_ALL, GROUP_BY_CANTON, GROUP_BY_REGION, GROUP_BY_POST_CODE)
+        ),
+        vol.Optional(ATTR_ACTIVE, default=True): cv.boolean,
+        vol.Optional(ATTR_INCLUDE_OUTLOOK, default=False): cv.boolean,
+    }
+)
+
+EXPORT_WARNINGS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMATS[0]): vol.In(EXPORT_FORMATS),
+    }
+)
+
+GET_WARNING_DETAILS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional(ATTR_HOURS, default=24): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=240)
+        ),
+    }
+)
+
+
+def _coordinators(
+    hass: HomeAssistant,
+    entry_id: str | None,
+) -> list[SwissMeteoWarningsCoordinator]:
+    """Get the coordinator of an entry, or all of them."""
+    coordinators = hass.data.get(DOMAIN, {})
+    if entry_id is None:
+        return list(coordinators.values())
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Config entry {entry_id} is not loaded")
+    return [coordinators[entry_id]]
+
+
+def _columns(hass: HomeAssistant) -> WarningColumns:
+    """Get the warnings of every monitored post code as columns."""
+    return WarningColumns({
+        coordinator.post_code: coordinator.data
+        for coordinator in _coordinators(hass, None)
+        if coordinator.data is not None
+    })
+
+
+async def _async_group(hass: HomeAssistant, group_by: str) -> Callable[[int], str | None]:
+    """Get the function mapping a post code to its group."""
+    if group_by == GROUP_BY_ALL:
+        return lambda _post_code: GROUP_BY_ALL
+    if group_by == GROUP_BY_CANTON:
+        if (index := await async_get_post_code_index(hass)) is None:
+            raise HomeAssistantError("The post code index is not installed")
+        return lambda post_code: None if (entry := index.get(post_code)) is None else entry.canton
+    if group_by == GROUP_BY_REGION:
+        if (regions := await async_get_warning_region_index(hass)) is None:
+            raise HomeAssistantError("No warning region mapping is installed")
+        return regions.region
+    return str
+
+
+def _warning_type(entry: er.RegistryEntry | None) -> WarningType | None:
+    """Get the warning type of a warning sensor, identified by <entry id>_<type>."""
+    if entry is None or entry.platform != DOMAIN or entry.domain != Platform.SENSOR:
+        return None
+    return WarningType.__members__.get(entry.unique_id.partition("_")[2])
+
+
+def _warning_sensors(
+    hass: HomeAssistant,
+    entity_ids: list[str] | None,
+) -> dict[str, tuple[SwissMeteoWarningsCoordinator, WarningType]]:
+    """Get the coordinator and the warning type of warning sensors, or of all of them."""
+    registry = er.async_get(hass)
+    if entity_ids is None:
+        entity_ids = [
+            entry.entity_id for entry in registry.entities.values()
+            if _warning_type(entry) is not None
+        ]
+
+    coordinators = hass.data.get(DOMAIN, {})
+    sensors = {}
+    for entity_id in entity_ids:
+        entry = registry.async_get(entity_id)
+        if (warning_type := _warning_type(entry)) is None:
+            raise HomeAssistantError(f"{entity_id} is not a warning sensor")
+        if (coordinator := coordinators.get(entry.config_entry_id)) is not None:
+            sensors[entity_id] = (coordinator, warning_type)
+    return sensors
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_profile_refresh(call: ServiceCall) -> None:
+        """Profile the next refresh cycles and write the report to the config dir."""
+        if hass.data.get(DATA_PROFILER) is not None:
+            raise HomeAssistantError("Refresh cycles are already being profiled")
+        coordinators = _coordinators(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        if not coordinators:
+            raise HomeAssistantError("No config entry loaded")
+
+        path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.utcnow().strftime('%Y%m%d%H%M%S')}"
+        )
+
+        @callback
+        def profiled(profiler: RefreshProfiler) -> None:
+            hass.data[DATA_PROFILER] = None
+            if profiler.profiled:
+                hass.async_add_executor_job(profiler.write, path)
+
+        LOGGER.info("Swiss Meteo Warnings - profiler - profiling %d refresh cycles",
+            call.data[ATTR_CYCLES]
+        )
+        hass.data[DATA_PROFILER] = RefreshProfiler(
+            coordinators, call.data[ATTR_CYCLES], profiled
+        )
+        if call.data[ATTR_REFRESH]:
+            for coordinator in coordinators:
+                await coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_REFRESH,
+        async_profile_refresh,
+        schema=PROFILE_REFRESH_SCHEMA,
+    )
+
+    @callback
+    def async_query_history(call: ServiceCall) -> ServiceResponse:
+        """Count the warnings valid during a time range and list their intervals."""
+        history: WarningHistory = hass.data[DATA_HISTORY]
+        start = call.data.get(ATTR_START)
+        end = call.data.get(ATTR_END)
+        records = history.query(
+            start=None if start is None else dt_util.as_utc(start),
+            end=None if end is None else dt_util.as_utc(end),
+            post_codes=call.data.get(ATTR_POST_CODE),
+            warning_types=call.data.get(ATTR_WARNING_TYPE),
+            min_level=WarningLevel(call.data[ATTR_MIN_LEVEL]),
+            include_outlook=call.data[ATTR_INCLUDE_OUTLOOK],
+        )
+
+        counts: dict[str, dict[str, int]] = {}
+        for record in records:
+            levels = counts.setdefault(record.type.name.lower(), {})
+            level = str(record.level.value)
+            levels[level] = levels.get(level, 0) + 1
+        return {
+            "count": len(records),
+            "counts": counts,
+            "intervals": [record.as_dict() for record in records[:call.data[ATTR_LIMIT]]],
+            "truncated": len(records) > call.data[ATTR_LIMIT],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_HISTORY,
+        async_query_history,
+        schema=QUERY_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_summarize_warnings(call: ServiceCall) -> ServiceResponse:
+        """Get the max level and the number of affected post codes per group and type."""
+        group = await _async_group(hass, call.data[ATTR_GROUP_BY])
+        columns = _columns(hass)
+        # pyarrow is imported and run off the event loop
+        groups = await hass.async_add_executor_job(
+            columns.rollup,
+            group,
+            dt_util.utcnow() if call.data[ATTR_ACTIVE] else None,
+            call.data[ATTR_INCLUDE_OUTLOOK],
+        )
+        return {
+            "sites": columns.sites,
+            "warnings": len(columns),
+            "groups": groups,
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SUMMARIZE_WARNINGS,
+        async_summarize_warnings,
+        schema=SUMMARIZE_WARNINGS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_export_warnings(call: ServiceCall) -> ServiceResponse:
+        """Write the warnings of every monitored post code to the config dir."""
+        export_format = call.data[ATTR_FORMAT]
+        columns = _columns(hass)
+        path = hass.config.path(
+            f"{DOMAIN}_warnings_{dt_util.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+        )
+        try:
+            await hass.async_add_executor_job(columns.write, path, export_format)
+        except ImportError as exception:
+            raise HomeAssistantError(
+                f"pyarrow is needed to export as {export_format}"
+            ) from exception
+        LOGGER.debug("Swiss Meteo Warnings - services - %d warnings exported to %s",
+            len(columns), path
+        )
+        return {"path": path, "sites": columns.sites, "warnings": len(columns)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_WARNINGS,
+        async_export_warnings,
+        schema=EXPORT_WARNINGS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    @callback
+    def async_get_warning_details(call: ServiceCall) -> ServiceResponse:
+        """Get the full warnings of sensors, their next level change and max level ahead."""
+        now = dt_util.utcnow()
+        end = now + timedelta(hours=call.data[ATTR_HOURS])
+        details = {}
+        for entity_id, (coordinator, warning_type) in _warning_sensors(
+            hass, call.data.get(ATTR_ENTITY_ID)
+        ).items():
+            if (snapshot := coordinator.data) is None:
+                continue
+            timeline = snapshot.timeline
+            next_change = timeline.next_change(now, warning_type)
+            details[entity_id] = {
+                "level": int(timeline.level_at(warning_type, now)),
+                "next_change": None if next_change is None else next_change.isoformat(),
+                "max_level": int(timeline.max_level_between(now, end, warning_type)),
+                "warnings": [
+                    {**warning.as_dict(), "type": warning.type.name.lower()}
+                    for warning in snapshot.by_type.get(warning_type, ())
+                ],
+            }
+        return details
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_WARNING_DETAILS,
+        async_get_warning_details,
+        schema=GET_WARNING_DETAILS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,107 @@
+"""Immutable snapshot of the warnings published by the coordinator."""
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from html import unescape
+from types import MappingProxyType
+
+from homeassistant.util import dt as dt_util
+
+from .swissmeteowarningsclient import SwissMeteoWarning, WarningLevel, WarningType
+from .timeline import WarningTimeline
+
+_TAGS = re.compile(r"<[^>]*>")
+_SPACES = re.compile(r"\s+")
+
+
+def _html_text(html: str) -> str:
+    """Get the text of an HTML body, on a single line."""
+    return _SPACES.sub(" ", unescape(_TAGS.sub(" ", html))).strip()
+
+
+@dataclass(frozen=True)
+class SwissMeteoWarningsSnapshot:
+    """Warnings of a post code, indexed by warning type.
+
+    A snapshot is shared by the sensors of every entry polling the same post
+    code, what they derive from it is computed once here.
+    """
+
+    warnings: tuple[SwissMeteoWarning, ...]
+    max_level: WarningLevel
+    timeline: WarningTimeline
+    by_type: Mapping[WarningType, tuple[SwissMeteoWarning, ...]]
+    summaries: Mapping[str, str]
+    # (type, timeline segment) -> warning setting the level or next one, the
+    # same for any time within the segment
+    __current: dict[tuple[WarningType, int], SwissMeteoWarning | None] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_warnings(
+        cls,
+        warnings: Iterable[SwissMeteoWarning],
+    ) -> SwissMeteoWarningsSnapshot:
+        """Build a snapshot, grouping the warnings per type once."""
+        warnings = tuple(warnings)
+        by_type = dict[WarningType, list[SwissMeteoWarning]]()
+        summaries = dict[str, str]()
+        for warning in warnings:
+            by_type.setdefault(warning.type, []).append(warning)
+            if warning.html is not None and warning.html not in summaries:
+                summaries[warning.html] = _html_text(warning.html)
+        return cls(
+            warnings,
+            max((warning.level for warning in warnings), default=WarningLevel.NONE),
+            WarningTimeline(warnings),
+            MappingProxyType({key: tuple(value) for key, value in by_type.items()}),
+            MappingProxyType(summaries),
+        )
+
+    def level(
+        self,
+        warning_type: WarningType,
+        when: datetime | None = None,
+    ) -> WarningLevel:
+        """Get the level of a warning type valid at a time, now by default."""
+        return self.timeline.level_at(warning_type, when or dt_util.utcnow())
+
+    def count(self, warning_type: WarningType) -> int:
+        """Get the number of warnings of a type."""
+        return len(self.by_type.get(warning_type, ()))
+
+    def summary(self, warning: SwissMeteoWarning) -> str | None:
+        """Get the text of the HTML body of a warning."""
+        if warning.html is None:
+            return None
+        if (summary := self.summaries.get(warning.html)) is None:
+            # A warning of another snapshot
+            summary = _html_text(warning.html)
+        return summary
+
+    def warning(
+        self,
+        warning_type: WarningType,
+        when: datetime | None = None,
+    ) -> SwissMeteoWarning | None:
+        """Get the warning of a type setting its level at a time, else the next one."""
+        when = when or dt_util.utcnow()
+        key = (warning_type, self.timeline.segment(when))
+        if key in self.__current:
+            return self.__current[key]
+
+        current = upcoming = None
+        for warning in self.by_type.get(warning_type, ()):
+            if warning.valid_to <= when:
+                continue
+            if warning.valid_from <= when:
+                if current is None or warning.level > current.level:
+                    current = warning
+            elif upcoming is None or warning.valid_from < upcoming.valid_from:
+                upcoming = warning
+        self.__current[key] = current or upcoming
+        return self.__current[key]
@@ -2,15 +2,21 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
+import random
+import re
 import socket
+import time
+from dataclasses import dataclass
 from enum import IntEnum
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import aiohttp
 import async_timeout
 
-import pandas as pd
-
 from .const import LOGGER
+from .metrics import STAGE_FETCH, STAGE_PARSE, PipelineMetrics
 
 class WarningType(IntEnum):
     """Types of warnings with ids."""
@@ -41,37 +47,215 @@ class WarningLevel(IntEnum):
     HIGH = 4
     HIGHEST = 5
 
+VALID_FROM_UNBOUNDED = datetime.min.replace(tzinfo=timezone.utc)
+VALID_TO_UNBOUNDED = datetime.max.replace(tzinfo=timezone.utc)
+
+@dataclass(frozen=True, slots=True)
 class Link:
     """Link returned by Api."""
 
-    def __init__(self):
-        """Init class."""
-        self.text = None
-        self.url = None
+    text: str | None
+    url: str | None
 
-    text: str
-    url: str
+    def as_dict(self) -> dict:
+        """Serialize the link."""
+        return {"text": self.text, "url": self.url}
 
+    @classmethod
+    def from_dict(cls, data: dict) -> Link:
+        """Deserialize a link."""
+        return cls(data.get("text"), data.get("url"))
+
+@dataclass(frozen=True, slots=True)
 class SwissMeteoWarning:
     """Warning object definition."""
 
-    def __init__(self):
-        """Init class."""
-        self.text = None
-        self.html = None
-        self.valid_from = datetime.min
-        self.valid_to = datetime.max
-        self.links = list[Link]()
-
-    text: str
-    html: str
     type: WarningType
     level: WarningLevel
-    outlook: bool
-    valid_from: datetime.timestamp
-    validTo: datetime.timestamp
-    links: list[Link]
+    text: str | None = None
+    html: str | None = None
+    outlook: bool = False
+    valid_from: datetime = VALID_FROM_UNBOUNDED
+    valid_to: datetime = VALID_TO_UNBOUNDED
+    links: tuple[Link, ...] = ()
+
+    def as_dict(self) -> dict:
+        """Serialize the warning."""
+        return {
+            "type": int(self.type),
+            "level": int(self.level),
+            "text": self.text,
+            "html": self.html,
+            "outlook": self.outlook,
+            "valid_from": None if self.valid_from is VALID_FROM_UNBOUNDED
+                else self.valid_from.isoformat(),
+            "valid_to": None if self.valid_to is VALID_TO_UNBOUNDED
+                else self.valid_to.isoformat(),
+            "links": [link.as_dict() for link in self.links],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SwissMeteoWarning:
+        """Deserialize a warning."""
+        return cls(
+            type=_WARNING_TYPES.get(data["type"], WarningType.UNKNOWN),
+            level=WarningLevel(data["level"]),
+            text=data.get("text"),
+            html=data.get("html"),
+            outlook=data.get("outlook", False),
+            valid_from=VALID_FROM_UNBOUNDED if data.get("valid_from") is None
+                else datetime.fromisoformat(data["valid_from"]),
+            valid_to=VALID_TO_UNBOUNDED if data.get("valid_to") is None
+                else datetime.fromisoformat(data["valid_to"]),
+            links=tuple(Link.from_dict(link) for link in data.get("links", ())),
+        )
+
+
+# Lookup tables, faster than calling the enums
+_WARNING_TYPES = {warning_type.value: warning_type for warning_type in WarningType}
+_WARNING_LEVELS = {warning_level.value: warning_level for warning_level in WarningLevel}
+
+
+def _from_epoch_ms(value: int) -> datetime:
+    """Convert milliseconds since epoch to an aware datetime."""
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+def _decode_links(value: list) -> tuple[Link, ...]:
+    """Decode the links of a warning."""
+    return tuple(Link(link.get("text"), link.get("url")) for link in value)
+
+
+# Optional fields of a warning: (field, JSON key, decoder, default when missing)
+_WARNING_SCHEMA = (
+    ("text", "text", None, None),
+    ("html", "htmlText", None, None),
+    ("outlook", "outlook", bool, False),
+    ("valid_from", "validFrom", _from_epoch_ms, VALID_FROM_UNBOUNDED),
+    ("valid_to", "validTo", _from_epoch_ms, VALID_TO_UNBOUNDED),
+    ("links", "links", _decode_links, ()),
+)
+
+
+def decode_warning(json_warning: dict) -> SwissMeteoWarning | None:
+    """Decode a warning of the API, None for the ones to ignore."""
+    if 'warnLevel' not in json_warning or 'warnType' not in json_warning:
+        return None
+
+    warn_level_int = json_warning['warnLevel']
+    if (warn_level := _WARNING_LEVELS.get(warn_level_int)) is None:
+        LOGGER.warning("Meteo Swiss Warnings Client - Warning level %s unknown.", str(warn_level_int))
+        warn_level = WarningLevel.NONE
+    elif warn_level is WarningLevel.NONE:
+        return None
 
+    warn_type_int = json_warning['warnType']
+    if (warn_type := _WARNING_TYPES.get(warn_type_int)) is None:
+        LOGGER.warning("Meteo Swiss Warnings Client - Warning type %s unknown.", str(warn_type_int))
+        warn_type = WarningType.UNKNOWN
+
+    fields = {}
+    for field, key, decoder, default in _WARNING_SCHEMA:
+        value = json_warning.get(key)
+        if value is None:
+            fields[field] = default
+        else:
+            fields[field] = value if decoder is None else decoder(value)
+    return SwissMeteoWarning(warn_type, warn_level, **fields)
+
+
+API_BASE_URL = "https://app-prod-ws.meteoswiss-app.ch"
+
+# Strings, possibly cut at the end of the buffer, and structural characters
+_JSON_TOKENS = re.compile(rb'"(?:[^"\\]|\\.)*(?:"|\\?\Z)|[{}\[\]]', re.S)
+_READ_CHUNK_SIZE = 16384
+
+# Requests in flight and recent responses, shared by all the clients of the process.
+# Keyed by (base url, post code, Accept-Language), values are (digest, warnings).
+_RESPONSE_CACHE_TTL = 15
+_RESPONSE_CACHE_MAX_SIZE = 1024
+_IN_FLIGHT = dict[tuple[str, str, str], asyncio.Future]()
+_RESPONSE_CACHE = dict[tuple[str, str, str], tuple[float, bytes, list]]()
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+# Backoff before the first retry, doubled for each following one, in seconds
+DEFAULT_RETRY_BACKOFF = 1
+_MAX_RETRY_DELAY = 30
+_RETRY_STATUSES = frozenset((429, 502, 503, 504))
+# Consecutive transient failures opening the circuit, and time before a probe
+_BREAKER_THRESHOLD = 5
+_BREAKER_RESET_TIMEOUT = 60
+
+class _JsonArrayExtractor:
+    """Locate the raw bytes of a top level array while a JSON document is read.
+
+    Only strings and brackets are visited, with a regular expression, so the rest
+    of the document is never decoded. What was scanned is dropped from the buffer,
+    which only holds the array once it started.
+    """
+
+    def __init__(self, key: str) -> None:
+        """Init class."""
+        self.__key = json.dumps(key).encode()
+        self.__buffer = bytearray()
+        self.__position = 0
+        self.__depth = 0
+        self.__key_end = None
+        self.__start = None
+        self.value: bytes | None = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk of the document, returns True once the array is complete."""
+        self.__buffer += chunk
+        if self.__scan():
+            return True
+        # Keep the array read so far, or what follows its key, else only a cut string
+        consumed = min(
+            offset for offset in (self.__position, self.__key_end, self.__start)
+            if offset is not None
+        )
+        if consumed:
+            del self.__buffer[:consumed]
+            self.__position -= consumed
+            if self.__key_end is not None:
+                self.__key_end -= consumed
+            if self.__start is not None:
+                self.__start -= consumed
+        return False
+
+    def __scan(self) -> bool:
+        """Visit the tokens of the buffer, returns True once the array is complete."""
+        for match in _JSON_TOKENS.finditer(self.__buffer, self.__position):
+            token = match.group()
+            if token[0] == 0x22:  # string
+                if not _is_closed_string(token):
+                    # Cut at the end of the buffer, wait for the next chunk
+                    return False
+                if self.__depth == 1 and self.__start is None:
+                    self.__key_end = match.end() if token == self.__key else None
+            elif token in b"{[":
+                if token == b"[" and self.__depth == 1 and self.__key_end is not None \
+                        and self.__buffer[self.__key_end:match.start()].strip() == b":":
+                    self.__start = match.start()
+                self.__key_end = None
+                self.__depth += 1
+            else:
+                self.__depth -= 1
+                if self.__depth == 1 and self.__start is not None:
+                    self.value = bytes(self.__buffer[self.__start:match.end()])
+                    return True
+            self.__position = match.end()
+        self.__position = len(self.__buffer)
+        return False
+
+
+def _is_closed_string(token: bytes) -> bool:
+    """Tell if a string token ends with an unescaped quote."""
+    if len(token) < 2 or token[-1] != 0x22:
+        return False
+    backslashes = len(token[1:-1]) - len(token[1:-1].rstrip(b"\\"))
+    return backslashes % 2 == 0
 
 
 class SwissMeteoWarningsApiClientError(Exception):
@@ -82,6 +266,99 @@ class SwissMeteoWarningsApiClientCommunicationError(
 ):
     """Exception to indicate a communication error."""
 
+class SwissMeteoWarningsApiClientCircuitOpenError(
+    SwissMeteoWarningsApiClientCommunicationError
+):
+    """Exception to indicate requests are not sent while the API is failing."""
+
+class _TransientError(SwissMeteoWarningsApiClientCommunicationError):
+    """Communication error worth retrying, after retry_after seconds if known."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        """Init exception."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fast fail requests to an API after consecutive transient failures.
+
+    Once open, a single probe request is let through after reset_timeout
+    seconds: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = _BREAKER_THRESHOLD,
+        reset_timeout: float = _BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        """Init class."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.__opened_at = None
+        self.__probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """Tell if requests are currently refused."""
+        return self.__opened_at is not None
+
+    def as_dict(self) -> dict:
+        """Serialize the state of the circuit."""
+        return {
+            "open": self.is_open,
+            "failures": self.failures,
+            "probe_in": None if self.__opened_at is None else max(
+                0.0, round(self.__opened_at + self.reset_timeout - time.monotonic(), 1)
+            ),
+        }
+
+    def acquire(self) -> None:
+        """Allow a request, raises when the circuit is open."""
+        if self.__opened_at is None:
+            return
+        if self.__probing or time.monotonic() - self.__opened_at < self.reset_timeout:
+            raise SwissMeteoWarningsApiClientCircuitOpenError(
+                "API unavailable, requests suspended",
+            )
+        LOGGER.debug("Swiss Meteo Warnings - client - Circuit half open, probing")
+        self.__probing = True
+
+    def release(self) -> None:
+        """Forget a request that ended without telling anything about the API."""
+        self.__probing = False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        if self.__opened_at is not None:
+            LOGGER.debug("Swiss Meteo Warnings - client - Circuit closed")
+        self.failures = 0
+        self.__opened_at = None
+        self.__probing = False
+
+    def record_failure(self) -> None:
+        """Count a transient failure, opening the circuit past the threshold."""
+        self.failures += 1
+        if self.__probing or self.failures >= self.threshold:
+            if self.__opened_at is None:
+                LOGGER.warning(
+                    "Swiss Meteo Warnings - client - %d consecutive failures, "
+                    "requests suspended for %s seconds", self.failures, self.reset_timeout
+                )
+            self.__opened_at = time.monotonic()
+        self.__probing = False
+
+
+# Circuit breakers shared by all the clients of an API
+_CIRCUIT_BREAKERS = dict[str, CircuitBreaker]()
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    """Get the circuit breaker of an API."""
+    if (breaker := _CIRCUIT_BREAKERS.get(base_url)) is None:
+        breaker = _CIRCUIT_BREAKERS[base_url] = CircuitBreaker()
+    return breaker
+
 class SwissMeteoWarningsApiClient:
     """Meteo Swiss Warnings API Client."""
 
@@ -93,10 +370,23 @@ class SwissMeteoWarningsApiClient:
         language : str,
         country : str,
         session: aiohttp.ClientSession,
+        base_url: str = API_BASE_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
     ) -> None:
         """Meteo Swiss Warnings API Client."""
         self.post_code = post_code
         self.__session = session
+        self.__base_url = base_url
+        self.__timeout = timeout
+        self.__retries = retries
+        self.__retry_backoff = retry_backoff
+        self.__breaker = get_circuit_breaker(base_url)
+        self.metrics = PipelineMetrics()
+        self.__validators = dict[str, dict[str, str]]()
+        self.__warnings_digest = None
+        self.__warnings = None
         accept_language = language
 
         LOGGER.debug("Init SwissMeteoWarningsApiClient with %s and %s", self.post_code, self.__session)
@@ -116,64 +406,79 @@ class SwissMeteoWarningsApiClient:
         }
 
 
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by the clients of the API."""
+        return self.__breaker
+
     async def async_get_data(self) -> any:
-        """Get data from the API."""
+        """Get data from the API.
+
+        The same list object is returned as long as the warnings are unchanged.
+        Concurrent calls for the same post code and language share one request,
+        and its response is reused for a few seconds.
+        """
+        key = (self.__base_url, str(self.post_code), self.__headers["Accept-Language"])
+        cached = _RESPONSE_CACHE.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            LOGGER.debug("Meteo Swiss Warnings Client - Response served from cache")
+            self.metrics.cache_hits += 1
+            self.metrics.record_success()
+            return self.__adopt(cached[1], cached[2])
+
+        if (request := _IN_FLIGHT.get(key)) is None:
+            request = _IN_FLIGHT[key] = asyncio.ensure_future(self.__async_fetch_warnings())
+            request.add_done_callback(lambda done: _request_done(key, done))
+        else:
+            LOGGER.debug("Meteo Swiss Warnings Client - Joining request in flight")
+            self.metrics.coalesced += 1
+
+        # A cancelled caller must not cancel the request of the others
+        try:
+            digest, warnings = await asyncio.shield(request)
+        except SwissMeteoWarningsApiClientError:
+            self.metrics.record_failure()
+            raise
+        self.metrics.record_success()
+        return self.__adopt(digest, warnings)
+
+    def __adopt(self, digest: bytes, warnings: list) -> list:
+        """Keep warnings fetched by any client, the list is kept when unchanged."""
+        if digest != self.__warnings_digest or self.__warnings is None:
+            self.__warnings_digest = digest
+            self.__warnings = warnings
+        return self.__warnings
+
+    async def __async_fetch_warnings(self) -> tuple[bytes, list]:
+        """Fetch the warnings, returns their digest and the decoded list."""
         LOGGER.debug("Get data from SwissMeteoWarningsApiClient from the API")
-        data = await self._api_wrapper(
+        start = time.perf_counter()
+        raw_warnings = await self._api_wrapper(
             method="get",
-            url = f"https://app-prod-ws.meteoswiss-app.ch/v2/plzDetail?plz={self.post_code}00",
-            headers=self.__headers
+            url = f"{self.__base_url}/v2/plzDetail?plz={self.post_code}00",
+            headers=self.__headers,
+            extract="warnings",
         )
-
-        warnings = list[SwissMeteoWarning]()
-        for json_warning in data['warnings']:
-            if 'warnLevel' in json_warning:
-                warn_level_int = json_warning.get('warnLevel')
-                try:
-                    warn_level = WarningLevel(warn_level_int)
-                    if (warn_level is WarningLevel.NONE):
-                        continue
-                except Exception:
-                    LOGGER.warning("Meteo Swiss Warnings Client - Warning level %s unknown.", str(warn_level_int))
-                    warn_level = WarningLevel.NONE
-            else:
-                continue
-
-            if 'warnType' in json_warning:
-                warn_type_int = json_warning.get('warnType')
-                try:
-                    warn_type = WarningType(warn_type_int)
-                except Exception:
-                    LOGGER.warning("Meteo Swiss Warnings Client - Warning type %s unknown.", str(warn_type_int))
-                    warn_type = WarningType.UNKNOWN
-            else:
-                continue
-
-            warning = SwissMeteoWarning()
-            warning.type = warn_type
-            warning.level = warn_level
-
-            warning.text = json_warning.get('text')
-            warning.html = json_warning.get('htmlText')
-
-            warning.outlook = json_warning.get('outlook')
-            if warning.outlook is None:
-                warning.outlook = False
-
-            if 'validFrom' in json_warning:
-                warning.valid_from = pd.to_datetime(json_warning['validFrom'], unit="ms")
-            if 'validTo' in json_warning:
-                warning.valid_to = pd.to_datetime(json_warning['validTo'], unit="ms")
-
-            if 'links' in json_warning:
-                for json_link in json_warning['links']:
-                    link = Link()
-                    link.url = json_link.get('url')
-                    link.text = json_link.get('text')
-                    warning.links.append(link)
-
-            warnings.append(warning)
-        return warnings
+        self.metrics.observe(STAGE_FETCH, time.perf_counter() - start)
+
+        if raw_warnings is None:
+            LOGGER.debug("Meteo Swiss Warnings Client - Not modified")
+            self.metrics.not_modified += 1
+            return self.__warnings_digest, self.__warnings
+
+        digest = hashlib.blake2b(raw_warnings, digest_size=16).digest()
+        if digest == self.__warnings_digest and self.__warnings is not None:
+            LOGGER.debug("Meteo Swiss Warnings Client - Warnings unchanged")
+            self.metrics.unchanged += 1
+            return digest, self.__warnings
+
+        start = time.perf_counter()
+        warnings = [
+            warning for json_warning in json.loads(raw_warnings)
+            if (warning := decode_warning(json_warning)) is not None
+        ]
+        self.metrics.observe(STAGE_PARSE, time.perf_counter() - start)
+        return digest, warnings
 
     async def _api_wrapper(
         self,
@@ -181,32 +486,160 @@ class SwissMeteoWarningsApiClient:
         url: str,
         data: dict | None = None,
         headers: dict | None = None,
+        extract: str | None = None,
     ) -> any:
-        """Get information from the API."""
+        """Get information from the API.
+
+        Transient errors are retried with a jittered exponential backoff, or after
+        the delay asked with Retry-After, unless the circuit breaker opens.
+        Responses are revalidated with ETag/Last-Modified, None means not modified.
+        With extract, only the raw JSON array of this top level key is returned.
+        """
+        attempt = 0
+        while True:
+            self.__breaker.acquire()
+            try:
+                result = await self.__async_request(method, url, data, headers, extract)
+            except _TransientError as exception:
+                self.__breaker.record_failure()
+                delay = exception.retry_after
+                if delay is None:
+                    delay = self.__retry_backoff * 2 ** attempt
+                    delay = random.uniform(delay / 2, delay)
+                if (
+                    attempt >= self.__retries
+                    or delay > _MAX_RETRY_DELAY
+                    or self.__breaker.is_open
+                ):
+                    raise
+                LOGGER.debug(
+                    "Swiss Meteo Warnings - client - %s, retry in %.1f seconds",
+                    exception, delay
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+            except SwissMeteoWarningsApiClientError:
+                # The API answered
+                self.__breaker.record_success()
+                raise
+            except BaseException:
+                self.__breaker.release()
+                raise
+            else:
+                self.__breaker.record_success()
+                return result
+
+    async def __async_request(
+        self,
+        method: str,
+        url: str,
+        data: dict | None,
+        headers: dict | None,
+        extract: str | None,
+    ) -> any:
+        """Make a single request to the API."""
+        validators = self.__validators.get(url)
+        if validators and self.__warnings is not None:
+            headers = {**(headers or {}), **validators}
         try:
-            async with async_timeout.timeout(10):
+            async with async_timeout.timeout(self.__timeout):
+                self.metrics.requests += 1
                 response = await self.__session.request(
                     method=method,
                     url=url,
                     headers=headers,
                     json=data,
                 )
+                if response.status == 304:
+                    response.release()
+                    return None
                 if response.status == 500:
+                    response.release()
                     raise SwissMeteoWarningsApiClientCommunicationError(
                         "Error 500. Probably unknown post code.",
                     )
+                if response.status in _RETRY_STATUSES:
+                    response.release()
+                    raise _TransientError(
+                        f"Error {response.status} fetching information",
+                        _retry_after(response),
+                    )
                 response.raise_for_status()
-                return await response.json()
+                self.__store_validators(url, response)
+                if extract is None:
+                    return await response.json()
+                return await self.__async_extract(response, extract)
 
+        except SwissMeteoWarningsApiClientError:
+            raise
         except asyncio.TimeoutError as exception:
-            raise SwissMeteoWarningsApiClientCommunicationError(
+            raise _TransientError(
                 "Timeout error fetching information",
             ) from exception
-        except (aiohttp.ClientError, socket.gaierror) as exception:
+        except aiohttp.ClientResponseError as exception:
             raise SwissMeteoWarningsApiClientCommunicationError(
                 "Error fetching information",
             ) from exception
+        except (aiohttp.ClientError, socket.gaierror) as exception:
+            raise _TransientError(
+                "Error fetching information",
+            ) from exception
         except Exception as exception:  # pylint: disable=broad-except
             raise SwissMeteoWarningsApiClientError(
                 "Something really wrong happened!"
             ) from exception
+
+    async def __async_extract(self, response: aiohttp.ClientResponse, key: str) -> bytes:
+        """Read a response, only keeping the raw JSON array of a top level key."""
+        extractor = _JsonArrayExtractor(key)
+        async for chunk in response.content.iter_chunked(_READ_CHUNK_SIZE):
+            self.metrics.bytes_received += len(chunk)
+            if extractor.feed(chunk):
+                break
+
+        if extractor.value is None:
+            # Missing, or not an array, as null
+            raise SwissMeteoWarningsApiClientError(f"No {key} array in the response")
+
+        # Drain the rest without keeping it, so the connection can be reused
+        async for chunk in response.content.iter_any():
+            self.metrics.bytes_received += len(chunk)
+        return extractor.value
+
+    def __store_validators(self, url: str, response: aiohttp.ClientResponse) -> None:
+        """Remember the cache validators of a response."""
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = last_modified
+        self.__validators[url] = validators
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> float | None:
+    """Get the delay asked by a Retry-After header, in seconds."""
+    if (value := response.headers.get("Retry-After")) is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_done(key: tuple[str, str, str], request: asyncio.Future) -> None:
+    """Forget a finished request, keeping its response for a few seconds."""
+    _IN_FLIGHT.pop(key, None)
+    if request.cancelled() or request.exception() is not None:
+        return
+
+    now = time.monotonic()
+    if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX_SIZE:
+        for expired in [k for k, v in _RESPONSE_CACHE.items() if v[0] <= now]:
+            del _RESPONSE_CACHE[expired]
+        if len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_MAX_SIZE:
+            del _RESPONSE_CACHE[next(iter(_RESPONSE_CACHE))]
+    _RESPONSE_CACHE[key] = (now + _RESPONSE_CACHE_TTL, *request.result())
@@ -0,0 +1,96 @@
+"""Validity window timeline of the warnings of a post code."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from types import MappingProxyType
+
+from .swissmeteowarningsclient import (
+    VALID_FROM_UNBOUNDED,
+    VALID_TO_UNBOUNDED,
+    SwissMeteoWarning,
+    WarningLevel,
+    WarningType,
+)
+
+
+class WarningTimeline:
+    """Interval index giving the level of each warning type at any time.
+
+    The time line is cut at every validity window start and end, each segment
+    holding the max level per type of the warnings valid during it.
+    """
+
+    def __init__(self, warnings: Iterable[SwissMeteoWarning]) -> None:
+        """Init class."""
+        warnings = tuple(warnings)
+        boundaries = set[datetime]()
+        for warning in warnings:
+            if warning.valid_from is not VALID_FROM_UNBOUNDED:
+                boundaries.add(warning.valid_from)
+            if warning.valid_to is not VALID_TO_UNBOUNDED:
+                boundaries.add(warning.valid_to)
+        self.boundaries: tuple[datetime, ...] = tuple(sorted(boundaries))
+
+        # Segment i starts at __starts[i] and ends at __starts[i + 1]
+        self.__starts = (VALID_FROM_UNBOUNDED, *self.boundaries)
+        self.__levels = list[Mapping[WarningType, WarningLevel]]()
+        for start in self.__starts:
+            levels = dict[WarningType, WarningLevel]()
+            for warning in warnings:
+                if warning.valid_from <= start < warning.valid_to \
+                        and warning.level > levels.get(warning.type, WarningLevel.NONE):
+                    levels[warning.type] = warning.level
+            self.__levels.append(MappingProxyType(levels))
+
+    def segment(self, when: datetime) -> int:
+        """Get the index of the segment containing a time, levels being constant within it."""
+        return bisect_right(self.__starts, when) - 1
+
+    def levels_at(self, when: datetime) -> Mapping[WarningType, WarningLevel]:
+        """Get the level of every warning type valid at a time."""
+        return self.__levels[self.segment(when)]
+
+    def level_at(self, warning_type: WarningType, when: datetime) -> WarningLevel:
+        """Get the level of a warning type at a time."""
+        return self.levels_at(when).get(warning_type, WarningLevel.NONE)
+
+    def max_level_between(
+        self,
+        start: datetime,
+        end: datetime,
+        warning_type: WarningType | None = None,
+    ) -> WarningLevel:
+        """Get the max level reached between two times, for one or all types."""
+        level = WarningLevel.NONE
+        last = max(self.segment(start), bisect_left(self.__starts, end) - 1)
+        for levels in self.__levels[self.segment(start):last + 1]:
+            if warning_type is None:
+                level = max(level, *levels.values(), WarningLevel.NONE)
+            else:
+                level = max(level, levels.get(warning_type, WarningLevel.NONE))
+        return level
+
+    def next_boundary(self, after: datetime) -> datetime | None:
+        """Get the first validity window start or end strictly after a time."""
+        index = bisect_right(self.boundaries, after)
+        if index < len(self.boundaries):
+            return self.boundaries[index]
+        return None
+
+    def next_change(
+        self,
+        after: datetime,
+        warning_type: WarningType | None = None,
+    ) -> datetime | None:
+        """Get the first time after a given one when a level changes."""
+        index = self.segment(after)
+        current = self.__levels[index]
+        for start, levels in zip(self.__starts[index + 1:], self.__levels[index + 1:]):
+            if warning_type is None:
+                if levels != current:
+                    return start
+            elif levels.get(warning_type) != current.get(warning_type):
+                return start
+        return None
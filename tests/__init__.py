@@ -0,0 +1 @@
+"""Tests of the swiss_meteo_warnings integration."""
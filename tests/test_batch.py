@@ -0,0 +1,87 @@
+"""Tests of the batch client."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+
+from benchmarks.stub import StubApi, load_fixture
+from custom_components.swiss_meteo_warnings.batch import create_session, fetch_many
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run the batch client as a module with Home Assistant not importable
+WITHOUT_HOME_ASSISTANT = """
+import runpy, sys
+
+class WithoutHomeAssistant:
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        if name.partition(".")[0] == "homeassistant":
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+sys.meta_path.insert(0, WithoutHomeAssistant)
+sys.argv = ["batch", *sys.argv[1:]]
+runpy.run_module("custom_components.swiss_meteo_warnings.batch", run_name="__main__")
+"""
+
+
+def test_batch_without_home_assistant() -> None:
+    """The batch client runs without Home Assistant, reading the post codes on stdin."""
+
+    async def run() -> tuple[int, bytes, bytes, set[str]]:
+        stub = StubApi([load_fixture("typical")], latency=0, jitter=0, error_rate=0)
+        url = await stub.async_start()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", WITHOUT_HOME_ASSISTANT, "--base-url", url, "-",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=ROOT,
+            )
+            stdout, stderr = await process.communicate(b"1000\n\n 2000 \n3000\n")
+        finally:
+            await stub.async_stop()
+        return process.returncode, stdout, stderr, stub.post_codes
+
+    returncode, stdout, stderr, fetched = asyncio.run(run())
+    assert returncode == 0, stderr.decode()
+    results = [json.loads(line) for line in stdout.decode().splitlines()]
+    assert sorted(result["post_code"] for result in results) == ["1000", "2000", "3000"]
+    assert all(result["warnings"] for result in results)
+    assert fetched == {"1000", "2000", "3000"}
+
+
+def test_fetch_many_slow_producer() -> None:
+    """Results of an async producer come while it is still producing."""
+
+    async def run() -> list[str]:
+        stub = StubApi([load_fixture("none")], latency=0, jitter=0, error_rate=0)
+        url = await stub.async_start()
+        events = list[str]()
+
+        async def produce():
+            for post_code in ("1000", "2000", "3000"):
+                events.append(f"produced {post_code}")
+                yield post_code
+                await asyncio.sleep(0.2)
+
+        try:
+            async with create_session(4) as session:
+                async for result in fetch_many(produce(), session, 4, base_url=url):
+                    assert result.error is None
+                    events.append(f"fetched {result.post_code}")
+        finally:
+            await stub.async_stop()
+        return events
+
+    assert asyncio.run(run()) == [
+        "produced 1000",
+        "fetched 1000",
+        "produced 2000",
+        "fetched 2000",
+        "produced 3000",
+        "fetched 3000",
+    ]
@@ -0,0 +1,92 @@
+"""Tests of the changes between two sets of warnings."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from custom_components.swiss_meteo_warnings.diff import WarningChangeType, diff_warnings
+from custom_components.swiss_meteo_warnings.swissmeteowarningsclient import (
+    SwissMeteoWarning,
+    WarningLevel,
+    WarningType,
+)
+
+_START = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+
+def _warning(
+    warning_type: WarningType = WarningType.THUNDERSTORM,
+    level: int = 2,
+    start: int = 0,
+    end: int = 6,
+    text: str = "",
+) -> SwissMeteoWarning:
+    """Build a warning valid between two hours after _START."""
+    return SwissMeteoWarning(
+        warning_type,
+        WarningLevel(level),
+        text=text,
+        valid_from=_START + timedelta(hours=start),
+        valid_to=_START + timedelta(hours=end),
+    )
+
+
+def _changes(old: list, new: list) -> list[tuple[WarningChangeType, int | None, int]]:
+    """Get the kind, previous and new level of the changes."""
+    return sorted(
+        (
+            change.type,
+            None if change.previous is None else int(change.previous.level),
+            int(change.warning.level),
+        )
+        for change in diff_warnings(old, new)
+    )
+
+
+def test_unchanged() -> None:
+    """Equal windows and levels are no change, even with another text."""
+    assert _changes([_warning()], [_warning(text="updated")]) == []
+
+
+def test_added_and_removed() -> None:
+    """Warnings without a counterpart are added or removed."""
+    assert _changes([_warning(WarningType.RAIN)], [_warning(WarningType.WIND, 3)]) == [
+        (WarningChangeType.ADDED, None, 3),
+        (WarningChangeType.REMOVED, None, 2),
+    ]
+
+
+def test_level_change_same_window() -> None:
+    """A new level for the same window is an escalation or a de-escalation."""
+    assert _changes([_warning(level=2)], [_warning(level=4)]) == [
+        (WarningChangeType.ESCALATED, 2, 4),
+    ]
+    assert _changes([_warning(level=4)], [_warning(level=2)]) == [
+        (WarningChangeType.DEESCALATED, 4, 2),
+    ]
+
+
+def test_revised_window() -> None:
+    """An overlapping window of the same type is a revision of the warning."""
+    assert _changes([_warning(end=6)], [_warning(start=1, end=9)]) == []
+    assert _changes([_warning(level=2, end=6)], [_warning(level=3, start=3, end=9)]) == [
+        (WarningChangeType.ESCALATED, 2, 3),
+    ]
+
+
+def test_disjoint_window() -> None:
+    """A later warning of the same type does not replace the ended one."""
+    assert _changes([_warning(end=6)], [_warning(start=6, end=9)]) == [
+        (WarningChangeType.ADDED, None, 2),
+        (WarningChangeType.REMOVED, None, 2),
+    ]
+
+
+def test_event_data() -> None:
+    """Events hold the warning without its bodies, and the previous level."""
+    change = diff_warnings([_warning(level=2)], [_warning(level=3)])[0]
+    data = change.as_event_data()
+    assert data["change"] == "escalated"
+    assert data["warning_type"] == "thunderstorm"
+    assert data["level"] == 3
+    assert data["previous_level"] == 2
+    assert "html" not in data and "links" not in data
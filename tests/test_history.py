@@ -0,0 +1,209 @@
+"""Tests of the warning history: file format, supersede, compaction, queries and writes."""
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.swiss_meteo_warnings.history import (
+    TIMESTAMP_UNBOUNDED,
+    WarningHistory,
+)
+from custom_components.swiss_meteo_warnings.swissmeteowarningsclient import (
+    SwissMeteoWarning,
+    WarningLevel,
+    WarningType,
+)
+
+_START = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+_HEADER_SIZE = 8
+_RECORD = struct.Struct("<HHII")
+
+
+def _warning(
+    warning_type: WarningType = WarningType.RAIN,
+    level: int = 2,
+    start: int = 0,
+    end: int = 6,
+    outlook: bool = False,
+) -> SwissMeteoWarning:
+    """Build a warning valid between two hours after _START."""
+    return SwissMeteoWarning(
+        warning_type,
+        WarningLevel(level),
+        outlook=outlook,
+        valid_from=_START + timedelta(hours=start),
+        valid_to=_START + timedelta(hours=end),
+    )
+
+
+class _Hass:
+    """Tasks and executor jobs, as Home Assistant runs them for the history."""
+
+    def async_create_task(self, target):
+        """Run a coroutine in a task."""
+        return asyncio.get_running_loop().create_task(target)
+
+    def async_add_executor_job(self, target, *args):
+        """Run a function in the executor."""
+        return asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+def _reload(path: str) -> WarningHistory:
+    """Load the history file in a new history."""
+    history = WarningHistory(path)
+    history.load()
+    return history
+
+
+def _size(path: str) -> int:
+    """Get the number of records in a history file."""
+    return (os.path.getsize(path) - _HEADER_SIZE) // _RECORD.size
+
+
+def test_round_trip(tmp_path) -> None:
+    """Records are read back as written, known ones are not written twice."""
+    path = str(tmp_path / "history")
+    history = WarningHistory(path)
+    warnings = [_warning(), _warning(WarningType.WIND, 3, outlook=True)]
+    history.write(history.add(1000, warnings))
+    assert history.add("1000", warnings) == b""
+    assert history.add(2000, warnings[:1])
+    assert len(history) == 3
+
+    loaded = _reload(path)
+    assert len(loaded) == 2
+    records = loaded.query(include_outlook=True)
+    assert [(r.post_code, r.type, r.level, r.outlook) for r in records] == [
+        (1000, WarningType.WIND, WarningLevel.CONSIDERABLE, True),
+        (1000, WarningType.RAIN, WarningLevel.MODERATE, False),
+    ]
+    assert records[0].as_dict()["valid_from"] == _START.isoformat()
+
+
+def test_unbounded_window(tmp_path) -> None:
+    """Unbounded windows are stored as the bounds of the timestamps."""
+    history = WarningHistory(str(tmp_path / "history"))
+    history.add(1000, [SwissMeteoWarning(WarningType.FLOOD, WarningLevel.LOW)])
+    (record,) = history.query()
+    assert (record.valid_from, record.valid_to) == (0, TIMESTAMP_UNBOUNDED)
+    assert record.as_dict()["valid_from"] is None
+    assert record.as_dict()["valid_to"] is None
+
+
+def test_supersede_and_compaction(tmp_path) -> None:
+    """A warning extended many times keeps its last window, the file is compacted."""
+    path = str(tmp_path / "history")
+    history = WarningHistory(path)
+    for end in range(6, 12):
+        history.write(history.add(1000, [_warning(end=end)]))
+    assert len(history) == 1
+    assert _size(path) == 6
+
+    loaded = _reload(path)
+    (record,) = loaded.query()
+    assert record.valid_to == int((_START + timedelta(hours=11)).timestamp())
+    assert _size(path) == 1
+
+
+def test_truncated_record(tmp_path) -> None:
+    """A record cut by a crash is dropped, the file is rewritten without it."""
+    path = str(tmp_path / "history")
+    history = WarningHistory(path)
+    history.write(history.add(1000, [_warning(), _warning(WarningType.WIND)]))
+    with open(path, "ab") as file:
+        file.write(b"\x01\x02\x03")
+
+    assert len(_reload(path)) == 2
+    assert os.path.getsize(path) == _HEADER_SIZE + 2 * _RECORD.size
+
+
+@pytest.mark.parametrize(
+    "kind",
+    [0x0FFF, 7 << 12 | WarningType.RAIN],
+    ids=["unknown type", "unknown level"],
+)
+def test_invalid_records(tmp_path, caplog: pytest.LogCaptureFixture, kind: int) -> None:
+    """Records of an unknown type or level are discarded with a warning, not raised."""
+    path = str(tmp_path / "history")
+    history = WarningHistory(path)
+    history.write(history.add(1000, [_warning()]))
+    history.write(_RECORD.pack(2000, kind, 0, TIMESTAMP_UNBOUNDED))
+
+    loaded = _reload(path)
+    assert [record.post_code for record in loaded.query()] == [1000]
+    assert "1 invalid records discarded" in caplog.text
+    assert _size(path) == 1
+
+
+def test_not_a_history_file(tmp_path) -> None:
+    """A file of another format is ignored."""
+    path = tmp_path / "history"
+    path.write_bytes(b"not a history file")
+    assert len(_reload(str(path))) == 0
+    assert path.read_bytes() == b"not a history file"
+
+
+def test_query(tmp_path) -> None:
+    """Records are filtered by window, post code, type, level and outlook."""
+    history = WarningHistory(str(tmp_path / "history"))
+    history.add(1000, [
+        _warning(start=0, end=6),
+        _warning(start=24, end=30),
+        _warning(WarningType.WIND, 1, start=2, end=4),
+        _warning(WarningType.SNOW, 4, start=48, end=50, outlook=True),
+    ])
+    history.add(2000, [_warning(start=3, end=5)])
+
+    def query(**kwargs) -> list[tuple[int, WarningType, int]]:
+        return [
+            (r.post_code, r.type, (r.valid_from - int(_START.timestamp())) // 3600)
+            for r in history.query(**kwargs)
+        ]
+
+    assert query(start=_START + timedelta(hours=4), end=_START + timedelta(hours=25)) == [
+        (1000, WarningType.RAIN, 0),
+        (2000, WarningType.RAIN, 3),
+        (1000, WarningType.RAIN, 24),
+    ]
+    # The window ends are exclusive
+    assert query(start=_START + timedelta(hours=6), end=_START + timedelta(hours=24)) == []
+    assert query(post_codes=["2000"]) == [(2000, WarningType.RAIN, 3)]
+    assert query(warning_types=[WarningType.WIND]) == [(1000, WarningType.WIND, 2)]
+    assert query(min_level=WarningLevel.MODERATE) == [
+        (1000, WarningType.RAIN, 0),
+        (2000, WarningType.RAIN, 3),
+        (1000, WarningType.RAIN, 24),
+    ]
+    assert query(min_level=WarningLevel.HIGH, include_outlook=True) == [
+        (1000, WarningType.SNOW, 48),
+    ]
+
+
+def test_writes_in_order(tmp_path) -> None:
+    """Background writes append in order, one at a time, and a flush waits for them."""
+    path = str(tmp_path / "history")
+    history = WarningHistory(path)
+    hass = _Hass()
+
+    async def run() -> None:
+        for end in range(6, 106):
+            history.async_write(hass, history.add(1000, [_warning(end=end)]))
+            if end % 10 == 0:
+                await asyncio.sleep(0)
+        await history.async_flush(hass)
+
+    asyncio.run(run())
+    assert _size(path) == 100
+    with open(path, "rb") as file:
+        data = file.read()
+    ends = [
+        _RECORD.unpack_from(data, offset)[3]
+        for offset in range(_HEADER_SIZE, len(data), _RECORD.size)
+    ]
+    assert ends == sorted(ends)
+    (record,) = _reload(path).query()
+    assert record.valid_to == int((_START + timedelta(hours=105)).timestamp())
@@ -0,0 +1,89 @@
+"""Tests of the offline post code index."""
+from __future__ import annotations
+
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+from custom_components.swiss_meteo_warnings.postcodes import PostCode, PostCodeIndex
+
+_POST_CODES = [
+    PostCode(1003, "Lausanne", "VD", 46.5197, 6.6323),
+    PostCode(1201, "Genève", "GE", 46.2100, 6.1426),
+    PostCode(3011, "Bern", "BE", 46.9480, 7.4474),
+    PostCode(8001, "Zürich", "ZH", 47.3717, 8.5423),
+    PostCode(9490, "Vaduz", "FL", 47.1410, 9.5215),
+]
+
+
+@pytest.fixture(params=[False, True], ids=["read", "mmap"])
+def index(request: pytest.FixtureRequest, tmp_path) -> PostCodeIndex:
+    """Write the post codes and load them back."""
+    path = str(tmp_path / "postcodes.bin")
+    assert PostCodeIndex.write(path, reversed(_POST_CODES)) == len(_POST_CODES)
+    return PostCodeIndex.load(path, use_mmap=request.param)
+
+
+def test_get(index: PostCodeIndex) -> None:
+    """Entries are read back by post code."""
+    assert len(index) == len(_POST_CODES)
+    entry = index.get("8001")
+    assert (entry.post_code, entry.place, entry.canton) == (8001, "Zürich", "ZH")
+    assert entry.latitude == pytest.approx(47.3717)
+    assert index.get(8000) is None
+    assert index.get(9999) is None
+
+
+def test_nearest(index: PostCodeIndex) -> None:
+    """The closest centroid within the distance is found, across grid cells."""
+    assert index.nearest(46.52, 6.64).post_code == 1003
+    assert index.nearest(46.95, 7.40).post_code == 3011
+    assert index.nearest(46.95, 7.40, max_distance=1) is None
+    # Between Lausanne and Geneva, nearer Geneva
+    assert index.nearest(46.30, 6.25, max_distance=100).post_code == 1201
+
+
+def test_load_missing_or_invalid(tmp_path) -> None:
+    """A missing or invalid file is no index."""
+    assert PostCodeIndex.load(str(tmp_path / "missing.bin")) is None
+    for content in (b"", b"SMWP", b"not an index at all", _truncated(tmp_path)):
+        path = tmp_path / "invalid.bin"
+        path.write_bytes(content)
+        assert PostCodeIndex.load(str(path)) is None
+        assert PostCodeIndex.load(str(path), use_mmap=True) is None
+
+
+def _truncated(tmp_path) -> bytes:
+    """Get a valid index cut in its columns."""
+    path = str(tmp_path / "full.bin")
+    PostCodeIndex.write(path, _POST_CODES)
+    with open(path, "rb") as file:
+        return file.read()[:30]
+
+
+def test_build_script(tmp_path) -> None:
+    """The build script groups the localities of the swisstopo directory by post code."""
+    localities = tmp_path / "AMTOVZ_CSV_WGS84.csv"
+    with open(localities, "w", encoding="utf-8-sig", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(["Ortschaftsname", "PLZ", "Kantonskürzel", "E", "N"])
+        writer.writerow(["Lausanne", "1003", "VD", "6.63", "46.51"])
+        writer.writerow(["Lausanne", "1003", "VD", "6.64", "46.53"])
+        writer.writerow(["Ouchy", "1003", "VD", "6.62", "46.50"])
+        writer.writerow(["Konstanz", "78462", "DE", "9.17", "47.66"])
+
+    output = tmp_path / "postcodes.bin"
+    subprocess.run(
+        [sys.executable, os.path.join("scripts", "build_postcodes"), str(localities),
+         "--output", str(output)],
+        check=True,
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+    )
+    index = PostCodeIndex.load(str(output))
+    assert len(index) == 1
+    entry = index.get(1003)
+    assert (entry.place, entry.canton) == ("Lausanne", "VD")
+    assert entry.latitude == pytest.approx(46.5133, abs=1e-4)
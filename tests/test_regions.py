@@ -0,0 +1,60 @@
+"""Tests of the warning regions: index and per region fetches against the stub API."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from benchmarks import load
+from custom_components.swiss_meteo_warnings import poller, swissmeteowarningsclient
+from custom_components.swiss_meteo_warnings.regions import WarningRegionIndex
+
+
+def test_index() -> None:
+    """Every post code of a region is served by the smallest one."""
+    index = WarningRegionIndex({"A": [1004, 1003, "1005"], "B": [2000], "C": []})
+    assert len(index) == 2
+    assert index.region(1004) == "A"
+    assert index.region("2000") == "B"
+    assert index.region(3000) is None
+    assert index.representative("1005") == "1003"
+    assert index.representative(2000) == "2000"
+    assert index.representative(3000) == "3000"
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["", "[]", '{"regions": 1}', '{"regions": {"A": 1}}', '{"other": {}}'],
+)
+def test_load_invalid(tmp_path, content: str) -> None:
+    """An invalid mapping is no index."""
+    path = tmp_path / "regions.json"
+    path.write_text(content)
+    assert WarningRegionIndex.load(str(path)) is None
+
+
+def test_load(tmp_path) -> None:
+    """A mapping file is loaded, a missing one is no index."""
+    assert WarningRegionIndex.load(str(tmp_path / "missing.json")) is None
+    path = tmp_path / "regions.json"
+    path.write_text(json.dumps({"regions": {"A": [1000, 1001]}}))
+    assert WarningRegionIndex.load(str(path)).representative(1001) == "1000"
+
+
+def test_fetch_per_region(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Entries of many post codes send one request target per warning region."""
+    # Patched by the harness, restored after the test
+    monkeypatch.setattr(poller, "SwissMeteoWarningsApiClient", poller.SwissMeteoWarningsApiClient)
+    monkeypatch.setattr(poller, "_POLLERS", {})
+    monkeypatch.setattr(poller, "_STORES", {})
+    monkeypatch.setattr(swissmeteowarningsclient, "_RESPONSE_CACHE_TTL", 0)
+
+    output = tmp_path / "report.json"
+    assert load.main([
+        "--entries", "12", "--post-codes", "8", "--warning-regions", "3",
+        "--duration", "0.1", "--latency", "0", "--jitter", "0",
+        "--output", str(output),
+    ]) == 0
+    setup = json.loads(output.read_text())["setup"]
+    assert setup["entries_loaded"] == 12
+    assert setup["pollers"] == setup["post_codes_fetched"] == 3
@@ -0,0 +1,194 @@
+"""Tests of the API client: extraction of the warnings, circuit breaker."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from benchmarks.stub import FIXTURES, StubApi, load_fixture
+from custom_components.swiss_meteo_warnings import swissmeteowarningsclient
+from custom_components.swiss_meteo_warnings.swissmeteowarningsclient import (
+    CircuitBreaker,
+    SwissMeteoWarningsApiClient,
+    SwissMeteoWarningsApiClientCircuitOpenError,
+    SwissMeteoWarningsApiClientError,
+    _JsonArrayExtractor,
+)
+
+
+def _extract(body: bytes, chunk_size: int, key: str = "warnings") -> bytes | None:
+    """Feed a document in chunks, returns the extracted array."""
+    extractor = _JsonArrayExtractor(key)
+    for offset in range(0, len(body), chunk_size):
+        if extractor.feed(body[offset:offset + chunk_size]):
+            break
+    return extractor.value
+
+
+@pytest.mark.parametrize("fixture", FIXTURES)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 16384])
+def test_extract_fixtures(fixture: str, chunk_size: int) -> None:
+    """The array is the one of the full decode, whatever the chunk boundaries."""
+    body = load_fixture(fixture)
+    value = _extract(body, chunk_size)
+    assert value is not None
+    assert json.loads(value) == json.loads(body)["warnings"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1000])
+def test_extract_escaped_strings(chunk_size: int) -> None:
+    """Escaped quotes, backslashes and brackets in strings are not tokens."""
+    document = {
+        "text": 'say "warnings": [1] \\',
+        "\"warnings\"": ["not this one"],
+        "nested": {"warnings": [{"not": "this one"}]},
+        "before\\": "]}",
+        "warnings": [{"text": "a \"quoted\" ] text \\", "links": [{"url": "x\\\"y"}]}],
+        "after": [1, 2],
+    }
+    body = json.dumps(document).encode()
+    assert json.loads(_extract(body, chunk_size)) == document["warnings"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+def test_extract_spacing(chunk_size: int) -> None:
+    """Whitespace around the colon is allowed, the value only starts after it."""
+    body = b'{ "warnings"  :\n [ ] , "b": [1]}'
+    assert _extract(body, chunk_size) == b"[ ]"
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"currentWeather": {"warnings": []}, "graph": [1, 2]}',
+        b'{"warnings": null, "graph": []}',
+        b'{"warnings": {"a": []}}',
+        b'{"text": "warnings", "graph": []}',
+    ],
+)
+def test_extract_missing(body: bytes) -> None:
+    """Nothing is extracted without a top level array for the key."""
+    assert _extract(body, 1) is None
+    assert _extract(body, len(body)) is None
+
+
+def test_extract_trims_consumed_prefix() -> None:
+    """Only the array is buffered, not the document read before it."""
+    body = json.dumps({"graph": ["x" * 1000] * 100, "warnings": [1, 2]}).encode()
+    extractor = _JsonArrayExtractor("warnings")
+    sizes = []
+    for offset in range(0, len(body), 512):
+        extractor.feed(body[offset:offset + 512])
+        sizes.append(len(extractor._JsonArrayExtractor__buffer))
+    assert extractor.value == b"[1, 2]"
+    assert max(sizes) < 2 * 512 + 1000
+
+
+def _get_data(body: bytes) -> list:
+    """Fetch the warnings of a payload served by the stub API."""
+
+    async def get_data() -> list:
+        stub = StubApi([body])
+        url = await stub.async_start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                client = SwissMeteoWarningsApiClient(
+                    1000, "en", "CH", session, base_url=url, retries=0
+                )
+                return await client.async_get_data()
+        finally:
+            await stub.async_stop()
+
+    return asyncio.run(get_data())
+
+
+def test_get_data() -> None:
+    """The warnings of a response are decoded."""
+    warnings = _get_data(load_fixture("storm"))
+    assert len(warnings) == len(json.loads(load_fixture("storm"))["warnings"])
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b'{"graph": []}', b'{"warnings": null}', b'{"warnings": 1}', b"[]"],
+)
+def test_get_data_without_warnings(body: bytes) -> None:
+    """A response without a warnings array is an API error."""
+    with pytest.raises(SwissMeteoWarningsApiClientError):
+        _get_data(body)
+
+
+class _Clock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    """Replace the clock of the circuit breaker."""
+    clock = _Clock()
+    monkeypatch.setattr(swissmeteowarningsclient.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock: _Clock) -> None:
+    """Requests are refused once threshold consecutive failures are reached."""
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.acquire()
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(SwissMeteoWarningsApiClientCircuitOpenError):
+        breaker.acquire()
+
+
+def test_breaker_success_resets_failures(clock: _Clock) -> None:
+    """Only consecutive failures count."""
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_breaker_single_probe(clock: _Clock) -> None:
+    """After reset_timeout one probe goes through, its outcome closes or reopens."""
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 59
+    with pytest.raises(SwissMeteoWarningsApiClientCircuitOpenError):
+        breaker.acquire()
+
+    clock.now += 1
+    breaker.acquire()
+    with pytest.raises(SwissMeteoWarningsApiClientCircuitOpenError):
+        breaker.acquire()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.as_dict()["probe_in"] == 60
+
+    clock.now += 60
+    breaker.acquire()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.acquire()
+
+
+def test_breaker_released_probe(clock: _Clock) -> None:
+    """A probe ended without an answer, as cancelled, lets another one through."""
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    breaker.acquire()
+    breaker.release()
+    breaker.acquire()